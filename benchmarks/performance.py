@@ -1,3 +1,4 @@
+import multiprocessing
 import time
 
 import numpy as np
@@ -7,21 +8,27 @@ from vectorlogic.engine import Engine
 _my_spec_ = "Intel_i7-12700H_31GB_Kubuntu_24.04.3_6.8.0-85-generic"
 
 
-def generate_random_rule(variables_: list[str], num_vars: int, operators_: list[str], random_state) -> str:
-    """Generates a random rule string with the given number of variables."""
-    rule_vars = random_state.choice(variables_, num_vars).tolist()
+MAX_VARS_PER_RULE = 4
 
-    def maybe_negate(var: str) -> str:
-        return f"!{var}" if random_state.choice([True, False]) else var
+
+def generate_random_rule(
+    pos: list[str], neg: list[str], var_indices: list[int], negate: np.ndarray, ops: list[str], parens: np.ndarray
+) -> str:
+    """
+    Assembles a rule string from pre-drawn variables, negations, operators and parentheses.
+
+    `pos` and `neg` are the variable names and their precomputed negations, so
+    no literal string is built per variable.
+    """
+    literals = [neg[i] if flag else pos[i] for i, flag in zip(var_indices, negate)]
 
     # Build a simple chained rule, e.g., v1 op v2 op v3 ...
-    rule_parts = [maybe_negate(rule_vars[0])]
+    num_vars = len(literals)
+    rule_parts = [literals[0]]
     for i in range(1, num_vars):
-        op = str(random_state.choice(operators_))
-        var_part = maybe_negate(rule_vars[i])
         # Add parentheses randomly to create more complex ASTs
-        rule_parts.extend([op, var_part])
-        if random_state.random() < 0.3 and i < num_vars - 1:
+        rule_parts.extend([ops[i - 1], literals[i]])
+        if parens[i - 1] and i < num_vars - 1:
             rule_so_far = " ".join(rule_parts)
             rule_so_far = f"({rule_so_far})"
             rule_parts = [rule_so_far]
@@ -30,12 +37,31 @@ def generate_random_rule(variables_: list[str], num_vars: int, operators_: list[
 
 
 def generate_engine(num_rules, num_vars, random_state, verbose=0):
+    """
+    Generates an engine with `num_rules` random rules over `num_vars` variables.
+
+    The randomness of all rules is drawn up front in a few batched calls. This consumes
+    the RNG stream differently from the earlier rule-by-rule draws, so a given seed now
+    yields different rules, and the `previous_result` figures printed by the benchmarks
+    below (recorded with the rule-by-rule draws) cannot be reproduced seed for seed.
+    """
     variables = [f"v{i + 1:02d}" for i in range(num_vars)]
+    neg_variables = ["!" + v for v in variables]
     operators = ["&&", "||", "=>", "<=", "=", "^^"]
+
+    # Draw all randomness for the whole engine up front, one vectorized call per kind
+    nvar_arr = random_state.randint(3, MAX_VARS_PER_RULE + 1, size=num_rules)  # 3 or 4 variables in the rule
+    var_index_matrix = random_state.choice(num_vars, size=(num_rules, MAX_VARS_PER_RULE)).tolist()
+    negate_matrix = random_state.random(size=(num_rules, MAX_VARS_PER_RULE)) < 0.5
+    op_matrix = random_state.choice(operators, size=(num_rules, MAX_VARS_PER_RULE - 1)).tolist()
+    paren_matrix = random_state.random(size=(num_rules, MAX_VARS_PER_RULE - 1)) < 0.3
+
     engine = Engine(variables=variables, name="Performance Test Engine")
-    for _ in range(num_rules):
-        num_rule_vars = random_state.randint(3, 5)  # 3 or 4 variables in the rule
-        rule = generate_random_rule(variables, num_rule_vars, operators, random_state)
+    for r in range(num_rules):
+        n = nvar_arr[r]
+        rule = generate_random_rule(
+            variables, neg_variables, var_index_matrix[r][:n], negate_matrix[r], op_matrix[r], paren_matrix[r]
+        )
         engine.add_rule(rule)
     engine._verbose = verbose
     return engine
@@ -52,6 +78,11 @@ def measure_compile_time(engine):
 
 
 def predict_one(compile_=True, verbose=0):
+    """
+    Predicts with the seed=425 engine, with or without compiling it first.
+
+    The seed=425 engine differs from the one of the recorded results, see `generate_engine`.
+    """
     print()
     print(f"Running predict_one() with compile = {compile_}")
     seed = 425
@@ -94,17 +125,32 @@ def predict_one(compile_=True, verbose=0):
     print(f"intermediate_sizes: {engine.intermediate_sizes_stats}")
 
 
-def run__compile_stats():
+def _compile_one_seed(args):
+    """Compiles one random engine; runs in a worker process of `run__compile_stats`."""
+    num_rules, num_vars, seed = args
+    rng = np.random.RandomState(seed)
+    engine = generate_engine(num_rules=num_rules, num_vars=num_vars, random_state=rng)
+    duration, engine = measure_compile_time(engine)
+    return duration, engine.intermediate_sizes
+
+
+def run__compile_stats(processes=None):
     """
     Measures the performance of engine compilation and prediction with a
     set of randomly generated rules.
+
+    The repeats for each number of rules are independent, so they are spread
+    over a pool of `processes` worker processes (all CPUs by default). Each
+    worker has its own parser and product caches.
+
+    The seeds of the slow outliers printed by earlier runs no longer select the
+    same engines, see `generate_engine`.
     """
     # import random
 
     N = 40  # Number of variables
 
     repeat = 30
-    rng = np.random.RandomState(442)
 
     time_mean = []
     time_min = []
@@ -113,35 +159,34 @@ def run__compile_stats():
     # M_range = [10, 15, 20, 25, 30]
     # M_range = [15, 20, 25, 30, 35, 40]
     M_range = list(range(30, 50, 5))
-    for M in M_range:
-        print()
-        print(f"M = {M}")
-
-        durations = []
-        for i in range(repeat):
-            seed = 1000 * M + i
-            rng.seed(seed)
-            # print(f"\nrepeat {i + 1} / {repeat}")
-            engine = generate_engine(num_rules=M, num_vars=N, random_state=rng)
-            duration, engine = measure_compile_time(engine)
-            if duration > 5:
-                print(f"--- Engine Performance Test ---")
-                print(f"seed = {seed}")
-                print(f"Compiled {M} rules with {N} variables in {duration:.4f} seconds.")
-                print(f"Intermediate sizes: {engine._intermediate_sizes}")
-            durations.append(duration)
-
-        t = float(np.mean(durations))
-        t_std = float(np.std(durations))
-        time_mean.append(t)
-        time_std.append(t_std)
-        time_min.append(float(min(durations)))
-        time_max.append(float(max(durations)))
-
-        print()
-        print(f"Summary for M = {M}:")
-        print("--------------------")
-        print(f"time = {t:.4f} +- {t_std:.4f}   [{time_min[-1]:.3g} - {time_max[-1]:.3g}]")
+    with multiprocessing.Pool(processes=processes) as pool:
+        for M in M_range:
+            print()
+            print(f"M = {M}")
+
+            seeds = [1000 * M + i for i in range(repeat)]
+            results = pool.map(_compile_one_seed, [(M, N, seed) for seed in seeds])
+
+            durations = []
+            for seed, (duration, intermediate_sizes) in zip(seeds, results):
+                if duration > 5:
+                    print(f"--- Engine Performance Test ---")
+                    print(f"seed = {seed}")
+                    print(f"Compiled {M} rules with {N} variables in {duration:.4f} seconds.")
+                    print(f"Intermediate sizes: {intermediate_sizes}")
+                durations.append(duration)
+
+            t = float(np.mean(durations))
+            t_std = float(np.std(durations))
+            time_mean.append(t)
+            time_std.append(t_std)
+            time_min.append(float(min(durations)))
+            time_max.append(float(max(durations)))
+
+            print()
+            print(f"Summary for M = {M}:")
+            print("--------------------")
+            print(f"time = {t:.4f} +- {t_std:.4f}   [{time_min[-1]:.3g} - {time_max[-1]:.3g}]")
 
     print()
     print("Summary:")
@@ -163,6 +208,12 @@ def run__compile_stats():
 
 
 def run__compile_one(seed=42, num_rules=60, num_vars=80, verbose=0):
+    """
+    Compiles one random engine and prints its intermediate sizes.
+
+    The recorded results for seeds 42, 425 and 666 were produced by the earlier
+    rule generation, see `generate_engine`.
+    """
     print()
     print("---  Running compile_one() ---")
     # seed = 42
@@ -212,6 +263,11 @@ def run__compile_one(seed=42, num_rules=60, num_vars=80, verbose=0):
 
 
 def run__to_compile_or_not_to_compile(verbose=0):
+    """
+    Compares predicting with and without compiling the seed=425 engine first.
+
+    The recorded result was produced by the earlier rule generation, see `generate_engine`.
+    """
     predict_one(compile_=True, verbose=verbose)
     predict_one(compile_=False, verbose=verbose)
     previous_result = """
@@ -0,0 +1,103 @@
+"""
+Tests for the on-disk compile cache helpers.
+"""
+
+import pytest
+
+from vectorlogic.compile_cache import compute_cache_key, load_state_vector, save_state_vector
+from vectorlogic.engine import Engine
+from vectorlogic.state_vector import StateVector
+from vectorlogic.t_object import TObject
+
+
+def test_state_vector_round_trip(tmp_path):
+    """Tests that a saved state vector is loaded back unchanged."""
+    sv = StateVector([TObject(ones={1, 9}, zeros={3}), TObject(zeros={1, 2}), TObject()])
+    path = str(tmp_path / "sv.npz")
+    save_state_vector(path, sv)
+    assert load_state_vector(path) == sv
+
+
+def test_empty_state_vector_round_trip(tmp_path):
+    """Tests that a contradiction (empty state vector) survives the round trip."""
+    path = str(tmp_path / "sv.npz")
+    save_state_vector(path, StateVector())
+    assert load_state_vector(path).is_contradiction()
+
+
+def test_null_state_vector_round_trip(tmp_path):
+    """Tests that null TObjects are restored as null TObjects, not dropped."""
+    sv = StateVector([TObject(is_null=True), TObject(ones={2})])
+    path = str(tmp_path / "sv.npz")
+    save_state_vector(path, sv)
+    loaded_sv = load_state_vector(path)
+    assert loaded_sv == sv
+    assert [t_obj.is_null for t_obj in loaded_sv] == [True, False]
+
+
+def test_contradiction_is_reloaded_from_cache(tmp_path):
+    """Tests that a contradictory knowledge base is reloaded as the valid set `compile()` produced."""
+    engine = Engine(variables=["a", "b"], rules=["a", "!a"])
+    engine.compile(cache_dir=str(tmp_path))
+
+    cached_engine = Engine(variables=["a", "b"], rules=["a", "!a"])
+    cached_engine.compile(cache_dir=str(tmp_path))
+    assert cached_engine.valid_set.is_contradiction()
+    assert cached_engine.valid_set == engine.valid_set
+
+
+def test_cache_key_depends_on_content():
+    """Tests that the cache key changes with the state vectors, variables and configuration."""
+    svs = [StateVector([TObject(ones={1})]), StateVector([TObject(zeros={2})])]
+    config = {"order": "heuristic"}
+    key = compute_cache_key(svs, ["a", "b"], config)
+    assert key == compute_cache_key(list(svs), ["a", "b"], dict(config))
+    assert key != compute_cache_key(svs[:1], ["a", "b"], config)
+    assert key != compute_cache_key(svs, ["a", "c"], config)
+    assert key != compute_cache_key(svs, ["a", "b"], {"order": "greedy"})
+
+
+def test_cache_key_distinguishes_null_and_trivial_t_objects(tmp_path):
+    """Tests that a contradiction and a tautology with the same empty masks do not share a cache entry."""
+    null_svs = [StateVector([TObject(is_null=True)])]
+    trivial_svs = [StateVector([TObject()])]
+    assert compute_cache_key(null_svs, ["a"], {}) != compute_cache_key(trivial_svs, ["a"], {})
+
+    trivial_engine = Engine(variables=["a", "b"], rules=["a || b"])
+    trivial_engine.add_state_vector(StateVector([TObject()]))
+    trivial_engine.compile(cache_dir=str(tmp_path))
+    assert trivial_engine.valid_set.size() == 2
+
+    null_engine = Engine(variables=["a", "b"], rules=["a || b"])
+    null_engine.add_state_vector(StateVector([TObject(is_null=True)]))
+    null_engine.compile(cache_dir=str(tmp_path))
+    assert null_engine.valid_set.size() == 0
+
+
+def test_cache_saves_indices_beyond_the_engine_variables(tmp_path):
+    """Tests that a valid set with indices above the number of engine variables can be cached."""
+    engine = Engine(variables=["a", "b"])
+    engine.add_state_vector(StateVector([TObject(ones=[5])]))
+    engine.compile(cache_dir=str(tmp_path))
+
+    cached_engine = Engine(variables=["a", "b"])
+    cached_engine.add_state_vector(StateVector([TObject(ones=[5])]))
+    cached_engine.compile(cache_dir=str(tmp_path))
+    assert cached_engine.valid_set == engine.valid_set == StateVector([TObject(ones=[5])])
+
+
+@pytest.mark.parametrize("corruption", ["junk", "truncated"])
+def test_corrupt_cache_entry_is_recompiled(tmp_path, corruption):
+    """Tests that an unreadable cache entry is replaced by a fresh compilation instead of failing it."""
+    engine = Engine(variables=["a", "b", "c"], rules=["a => b", "b ^^ c"])
+    engine.compile(cache_dir=str(tmp_path))
+    (entry,) = tmp_path.glob("*.npz")
+    if corruption == "junk":
+        entry.write_bytes(b"not an npz file")
+    else:
+        entry.write_bytes(entry.read_bytes()[:40])
+
+    recompiled_engine = Engine(variables=["a", "b", "c"], rules=["a => b", "b ^^ c"])
+    recompiled_engine.compile(cache_dir=str(tmp_path))
+    assert recompiled_engine.valid_set == engine.valid_set
+    assert load_state_vector(str(entry)) == engine.valid_set
@@ -442,3 +442,135 @@ def test_engine_compile_optimisation():
     0 1 0 0 0 1 -
     0 - - 0 1 0 -
     """
+
+
+@pytest.mark.parametrize("order", ["greedy", "left-to-right"])
+def test_engine_compile_orders_are_equivalent(order):
+    """Tests that all multiplication orders compile to logically equivalent valid sets."""
+    variables = ["v1", "v2", "v3", "v4", "v5", "v6", "v7"]
+    rules = [
+        "(v1 && v6) => v2",
+        "(v2 && v3) => v5",
+        "v1 => (v3 || v4)",
+        "v5 = !v6",
+        "v6 => (v1 || v2)",
+        "v7 ^^ v3",
+    ]
+    reference = Engine(variables=variables, rules=rules)
+    reference.compile()
+    engine = Engine(variables=variables, rules=rules)
+    engine.compile(order=order)
+
+    for var in variables:
+        for value in (True, False):
+            expected = reference.predict({var: value})
+            result = engine.predict({var: value})
+            assert result.is_contradiction() == expected.is_contradiction()
+            for other in variables:
+                assert result.get_value(other) == expected.get_value(other)
+
+
+def test_engine_compile_unknown_order_raises_error(base_engine):
+    """Tests that an unknown multiplication order raises a ValueError."""
+    base_engine.add_rule("x1 => x2")
+    with pytest.raises(ValueError, match="Unknown multiplication order"):
+        base_engine.compile(order="random")
+
+
+def test_predict_stops_on_contradictory_evidence(base_engine):
+    """Tests that predict() stops as soon as the evidence contradicts a rule."""
+    base_engine.add_rule("x1 => x2")
+    base_engine.add_rule("x2 = x3")
+
+    result = base_engine.predict({"x1": True, "x2": False})
+    assert result.is_contradiction()
+    # The first conditioned rule already became a contradiction.
+    assert base_engine.intermediate_sizes == [0]
+
+    result = base_engine.predict({"x1": True})
+    assert result.get_value("x3") == 1
+
+
+def test_engine_compile_uses_disk_cache(tmp_path, monkeypatch):
+    """Tests that a compiled valid set is stored on disk and reused by an identical engine."""
+    variables = ["v1", "v2", "v3", "v4", "v5"]
+    rules = ["(v1 && v2) => v3", "v3 = (v4 || !v5)", "v2 ^^ v4"]
+
+    engine = Engine(variables=variables, rules=rules)
+    engine.compile(cache_dir=str(tmp_path))
+    assert len(list(tmp_path.glob("*.npz"))) == 1
+
+    num_calls = []
+    multiply_all_vectors = Engine.multiply_all_vectors
+
+    def counting_multiply_all_vectors(*args, **kwargs):
+        num_calls.append(1)
+        return multiply_all_vectors(*args, **kwargs)
+
+    monkeypatch.setattr(Engine, "multiply_all_vectors", staticmethod(counting_multiply_all_vectors))
+    monkeypatch.setenv("VECTORLOGIC_CACHE_DIR", str(tmp_path))
+
+    cached_engine = Engine(variables=variables, rules=rules)
+    cached_engine.compile()
+    assert not num_calls
+    assert cached_engine.valid_set == engine.valid_set
+
+    # A different rule set misses the cache and adds a second entry.
+    other_engine = Engine(variables=variables, rules=rules[:2])
+    other_engine.compile()
+    assert len(num_calls) == 1
+    assert len(list(tmp_path.glob("*.npz"))) == 2
+
+
+@pytest.mark.parametrize("compile_", [True, False])
+def test_predict_batch_matches_predict(compile_):
+    """Tests that predict_batch() gives the same results as calling predict() per evidence."""
+    variables = ["v1", "v2", "v3", "v4", "v5", "v6"]
+    rules = ["(v1 && v2) => v3", "v3 = (v4 || !v5)", "v2 ^^ v4", "v6 => v1"]
+    engine = Engine(variables=variables, rules=rules)
+    if compile_:
+        engine.compile()
+
+    evidences = [{}, {"v1": True}, {"v2": True, "v4": True}, {"v5": False, "v6": True}, {"v3": False, "v1": True}]
+    results = engine.predict_batch(evidences)
+    assert len(results) == len(evidences)
+    for evidence, result in zip(evidences, results):
+        expected = engine.predict(evidence)
+        assert result.is_contradiction() == expected.is_contradiction()
+        for var in variables:
+            assert result.get_value(var) == expected.get_value(var)
+
+
+def test_predict_compiled_matches_uncompiled():
+    """Tests that the indexed predict() of a compiled engine matches the uncompiled inference."""
+    variables = ["v1", "v2", "v3", "v4", "v5"]
+    rules = ["(v1 && v2) => v3", "v3 = (v4 || !v5)", "v2 ^^ v4"]
+    uncompiled = Engine(variables=variables, rules=rules)
+    engine = Engine(variables=variables, rules=rules)
+    engine.compile()
+
+    evidences = [{}, {"v1": True, "v2": True}, {"v3": False, "v5": False}, {"v2": True, "v4": True}]
+    for evidence in evidences:
+        expected = uncompiled.predict(evidence)
+        result = engine.predict(evidence)
+        assert result.is_contradiction() == expected.is_contradiction()
+        for var in variables:
+            assert result.get_value(var) == expected.get_value(var)
+
+    # The index is rebuilt once new rules are compiled into the valid set.
+    engine.add_rule("!v3")
+    engine.compile()
+    assert engine.predict({}).get_value("v2") == 1
+    assert engine.predict({"v1": True}).is_contradiction()
+
+
+def test_multiply_all_vectors_skips_duplicate_vectors():
+    """Tests that identical state vectors are multiplied only once."""
+    sv1 = StateVector([TObject(ones={1}), TObject(zeros={2})])
+    sv2 = StateVector([TObject(ones={2}), TObject(zeros={3})])
+    duplicate = StateVector([TObject(zeros={2}), TObject(ones={1})])
+
+    product, int_sizes = Engine.multiply_all_vectors([sv1, sv2, duplicate, sv2], {})
+    assert product == sv1 * sv2
+    # Only a single multiplication was needed.
+    assert len(int_sizes) == 1
@@ -9,21 +9,36 @@ from vectorlogic.helpers import (
     calc_ps_unions_intersections,
     update_ps_unions_intersections,
     find_next_cluster,
+    find_greedy_pair,
     find_predator_prey,
+    find_subsumed,
+    _bitwise_count_lookup,
 )
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def sample_pivot_sets():
-    """Provides a sample list of pivot sets for testing."""
-    return [{1, 2, 3}, {3, 4, 5}, {1, 4, 5}]
+    """Provides a sample of pivot sets for testing, shared by the tests of the module."""
+    return (frozenset({1, 2, 3}), frozenset({3, 4, 5}), frozenset({1, 4, 5}))
+
+
+def test_bitwise_count_lookup():
+    """
+    Tests the byte lookup popcount used when NumPy has no `bitwise_count`.
+    """
+    rng = np.random.default_rng(0)
+    words = rng.integers(0, 2**64, size=(50, 3), dtype=np.uint64, endpoint=False)
+    words[0, 0] = 0
+    words[0, 1] = 2**64 - 1
+    expected = np.array([[bin(int(w)).count("1") for w in row] for row in words])
+    np.testing.assert_array_equal(_bitwise_count_lookup(words), expected)
 
 
 def test_calc_ps_unions_intersections_basic(sample_pivot_sets):
     """
     Tests the calculation of union and intersection sizes for a basic case.
     """
-    union_sizes, intersection_sizes = calc_ps_unions_intersections(sample_pivot_sets)
+    union_sizes, intersection_sizes = calc_ps_unions_intersections(list(sample_pivot_sets))
 
     expected_intersections = np.array([[3, 1, 1], [1, 3, 2], [1, 2, 3]])
 
@@ -85,13 +100,13 @@ def test_update_ps_unions_intersections(sample_pivot_sets):
     """
 
     # 1. Initial calculation
-    initial_unions, initial_intersections = calc_ps_unions_intersections(sample_pivot_sets)
+    initial_unions, initial_intersections = calc_ps_unions_intersections(list(sample_pivot_sets))
 
     # 2. Simulate two added pivot sets
     new_pivot_sets = [{2, 3, 6}, {1, 6}]
 
     # The new list of pivot sets for the next iteration.
-    updated_pivot_sets = sample_pivot_sets + new_pivot_sets
+    updated_pivot_sets = list(sample_pivot_sets) + new_pivot_sets
 
     # Indices to remove from the original matrices (sorted descending).
     indices_to_remove = [1]
@@ -134,7 +149,7 @@ def test_find_next_cluster(sample_pivot_sets):
     """
     Tests the find_next_cluster logic.
     """
-    union_sizes, intersection_sizes = calc_ps_unions_intersections(sample_pivot_sets)
+    union_sizes, intersection_sizes = calc_ps_unions_intersections(list(sample_pivot_sets))
 
     # With max_cluster_size = 2
     # Jaccard similarities:
@@ -149,16 +164,46 @@ def test_find_next_cluster(sample_pivot_sets):
     # Scores in row 1: [0.2, 0, 0.5]
     # Sorted indices (desc): [2, 0]
     # Cluster: [1, 2]
-    cluster = find_next_cluster(sample_pivot_sets, union_sizes, intersection_sizes, max_cluster_size=2)
+    cluster = find_next_cluster(list(sample_pivot_sets), union_sizes, intersection_sizes, max_cluster_size=2)
     assert sorted(cluster) == [1, 2]
 
     # With max_cluster_size = 3
     # Same as above, but we take more from sorted_indices
     # Cluster: [1, 2, 0]
-    cluster = find_next_cluster(sample_pivot_sets, union_sizes, intersection_sizes, max_cluster_size=3)
+    cluster = find_next_cluster(list(sample_pivot_sets), union_sizes, intersection_sizes, max_cluster_size=3)
     assert sorted(cluster) == [0, 1, 2]
 
 
+def test_find_next_cluster_tie_order():
+    """
+    Tests that candidates are taken by descending score, then by descending index.
+    """
+    # Row 0 has a Jaccard similarity of 2/3 with row 7 and of 1/3 with all other rows. There are
+    # more than 16 rows, where NumPy's default sort would no longer keep the ties in index order.
+    pivot_sets = [{1, 2}] + [{1 + i % 2, 10 + i} for i in range(1, 21)]
+    pivot_sets[7] = {1, 2, 9}
+    union_sizes, intersection_sizes = calc_ps_unions_intersections(pivot_sets)
+    cluster = find_next_cluster(pivot_sets, union_sizes, intersection_sizes, max_cluster_size=4)
+    assert cluster == [0, 7, 20, 19]
+
+
+def test_find_greedy_pair():
+    """
+    Tests that find_greedy_pair picks the pair with the smallest estimated product.
+    """
+    sv_sizes = [4, 4, 2]
+    union_sizes, intersection_sizes = calc_ps_unions_intersections([{1, 2}, {1, 2}, {5, 6}])
+    # Estimated sizes with base=0.5:
+    # (0,1): 4 * 4 * 0.5^2 = 4
+    # (0,2): 4 * 2 * 0.5^0 = 8
+    # (1,2): 4 * 2 * 0.5^0 = 8
+    assert find_greedy_pair(sv_sizes, union_sizes, intersection_sizes, base=0.5) == (0, 1)
+
+    # Equal estimates are resolved by the smaller union of pivot sets.
+    union_sizes, intersection_sizes = calc_ps_unions_intersections([{1, 2, 3}, {4}, {5}])
+    assert find_greedy_pair([1, 1, 1], union_sizes, intersection_sizes) == (1, 2)
+
+
 def test_find_predator_prey_success():
     """
     Tests a scenario where a predator should be successfully identified.
@@ -250,3 +295,11 @@ def test_find_predator_prey_too_few_vectors():
 
     assert predator_idx is None
     assert prey_indices is None
+
+
+def test_find_subsumed():
+    """Tests that TObjects more specific than another one are found, across word boundaries."""
+    ones_masks = [0b10, 0b110, 0b100, 1 << 70, (1 << 70) | 0b10]
+    zeros_masks = [0, 0b1000, 0b10, 0, 0]
+    subsumed = find_subsumed(ones_masks, zeros_masks)
+    np.testing.assert_array_equal(subsumed, [False, True, False, False, True])
@@ -2,6 +2,9 @@
 End-to-end tests for the RuleConverter class, combining all relevant test cases.
 """
 
+import itertools
+import sys
+
 import pytest
 
 from vectorlogic.rule_converter import RuleConverter
@@ -9,7 +12,7 @@ from vectorlogic.state_vector import StateVector
 from vectorlogic.t_object import TObject
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def variable_map():
     """Provides a sample variable map for testing."""
     return {"x1": 1, "x2": 2, "x3": 3, "x4": 4, "x5": 5}
@@ -21,7 +24,7 @@ def converter(variable_map):
     return RuleConverter(variable_map)
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def binary_map():
     op2vector = {
         "&&": StateVector([TObject(ones={1, 2})]),
@@ -34,7 +37,7 @@ def binary_map():
     return op2vector
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def triplet_map():
     op2vector = {
         "&&": StateVector(
@@ -99,11 +102,11 @@ def test_convert_single_variable_negated(converter):
     assert sv == expected_sv
 
 
-def test_convert_simple_binary_operations(converter, binary_map):
+@pytest.mark.parametrize("op", ["&&", "||", "^^", "=>", "<=", "="])
+def test_convert_simple_binary_operations(converter, binary_map, op):
     """Tests conversion of all simple binary operation rules."""
-    for op, expected_sv in binary_map.items():
-        sv = converter.convert(f"x1 {op} x2")
-        assert sv == expected_sv
+    sv = converter.convert(f"x1 {op} x2")
+    assert sv == binary_map[op]
 
 
 def test_convert_simple_or_operation_with_negation(converter):
@@ -114,11 +117,11 @@ def test_convert_simple_or_operation_with_negation(converter):
     assert sv == expected_sv
 
 
-def test_convert_triplet_operations(converter, triplet_map):
+@pytest.mark.parametrize("op", ["&&", "||", "^^", "=>", "<=", "="])
+def test_convert_triplet_operations(converter, triplet_map, op):
     """Tests conversion of all triplet operation rules."""
-    for op, expected_sv in triplet_map.items():
-        sv = converter.convert(f"x1 = (x2 {op} x3)")
-        assert sv == expected_sv
+    sv = converter.convert(f"x1 = (x2 {op} x3)")
+    assert sv == triplet_map[op]
 
 
 def test_convert_triplet_with_negation(converter):
@@ -149,6 +152,32 @@ def test_convert_complex_rule(converter):
     assert sv == expected_sv
 
 
+@pytest.mark.parametrize(
+    "rule, reference, num_aux",
+    [
+        ("x1 = (x2 && (x3 || !x4))", "(x1 => (x2 && (x3 || !x4))) && ((x2 && (x3 || !x4)) => x1)", 1),
+        ("((x2 => x3) ^^ (x4 <= x5)) = !x1", "!x1 = ((x2 => x3) ^^ (x4 <= x5))", 2),
+    ],
+)
+def test_convert_definition_uses_defined_variable(converter, rule, reference, num_aux):
+    """
+    Tests that a root definition `x = (expr)` needs no auxiliary variable for `expr` itself.
+    """
+    sv = converter.convert(rule)
+    assert len(converter._aux_var_map) == num_aux
+
+    reference_sv = converter.convert(reference)
+    for assignment in itertools.product([0, 1], repeat=5):
+        values = dict(zip(range(1, 6), assignment))
+
+        def satisfies(state_vector):
+            return any(
+                all(values[k] == 1 for k in t.ones) and all(values[k] == 0 for k in t.zeros) for t in state_vector
+            )
+
+        assert satisfies(sv) == satisfies(reference_sv)
+
+
 def test_converter_resets_state(converter):
     """
     Tests that the converter resets its auxiliary variable counter between calls.
@@ -167,6 +196,23 @@ def test_converter_resets_state(converter):
     assert converter._aux_var_map == {"__aux_1": -1, "__aux_2": -2}
 
 
+def test_cached_simple_asts_are_reused_with_another_variable_map(converter):
+    """Tests that a rule converted by one converter is converted correctly by another."""
+    rule = "(x1 && x2) => (x3 <= x1)"
+    expected = converter.convert(rule)
+
+    # Same variables, shifted indices: the cached simple ASTs are mapped to the new indices.
+    shifted = RuleConverter({"x0": 1, "x1": 2, "x2": 3, "x3": 4})
+    result = shifted.convert(rule)
+    assert shifted._aux_var_map == converter._aux_var_map
+    assert result == StateVector(
+        [TObject(ones={i + 1 for i in t.ones}, zeros={i + 1 for i in t.zeros}) for t in expected]
+    )
+
+    with pytest.raises(ValueError, match="Variable 'x3' is not defined"):
+        RuleConverter({"x1": 1, "x2": 2}).convert(rule)
+
+
 def test_undefined_variable_raises_error(converter):
     """Tests that a rule with an undefined variable raises a ValueError."""
     with pytest.raises(ValueError, match="Variable 'y1' is not defined"):
@@ -243,3 +289,71 @@ def test_convert_repeated_variable_in_complex_rule(converter):
         ("op", "=", ("var", False, "x2"), ("var", False, "__aux_3")),
     ]
     assert simple_asts == converter._all_simple_asts
+
+
+def test_flatten_deep_rule_without_recursion():
+    """Tests that rules nested deeper than the recursion limit are flattened."""
+    num_vars = sys.getrecursionlimit() + 100
+    converter = RuleConverter({f"x{i}": i for i in range(1, num_vars + 1)})
+    ast = converter._parser.parse(" && ".join(f"x{i}" for i in range(1, num_vars + 1)))
+
+    modified_ast, equality_asts = converter._handle_repeated_variables_in_ast(ast)
+    assert equality_asts == []
+
+    simple_asts = converter._flatten(modified_ast)
+    assert len(simple_asts) == num_vars - 1
+    assert simple_asts[0] == (
+        "op",
+        "=",
+        ("var", False, "__aux_1"),
+        ("op", "&&", ("var", False, "x1"), ("var", False, "x2")),
+    )
+    assert simple_asts[-1] == ("op", "&&", ("var", False, f"__aux_{num_vars - 2}"), ("var", False, f"x{num_vars}"))
+
+
+def test_converted_state_vectors_are_cached(converter):
+    """Tests that a rule is converted once per assignment of indices to its variables."""
+    RuleConverter.clear_cache()
+    rule = "x1 = (x2 || (x3 && x1))"
+    sv = converter.convert(rule)
+    assert RuleConverter({"x1": 1, "x2": 2, "x3": 3, "x9": 9}).convert(rule) == sv
+    assert converter.convert(rule) is sv
+    assert converter._aux_var_map == {"__aux_1": -1, "__aux_2": -2}
+
+    # Other indices of the same variables give another state vector.
+    shifted = RuleConverter({"x1": 2, "x2": 3, "x3": 4})
+    assert shifted.convert(rule) != sv
+
+    RuleConverter.clear_cache()
+    assert converter.convert(rule) is not sv
+    assert converter.convert(rule) == sv
+
+
+def test_convert_long_rule_multiplies_smallest_products_first():
+    """Tests the conversion of a rule which is flattened into many simple rules."""
+    names = [f"x{i}" for i in range(1, 61)]
+    converter = RuleConverter({name: i for i, name in enumerate(names, start=1)})
+
+    sv = converter.convert(" && ".join(names))
+    assert sv == StateVector([TObject(ones=set(range(1, 61)))])
+
+
+@pytest.mark.parametrize("negated", list(itertools.product([False, True], repeat=3)))
+@pytest.mark.parametrize("op", ["&&", "||", "^^", "=>", "<=", "="])
+def test_negated_triplet_templates_match_truth_table(op, negated):
+    """Tests that the negations baked into the triplet templates give the right truth table."""
+    truth = {
+        "&&": lambda a, b: a and b,
+        "||": lambda a, b: a or b,
+        "^^": lambda a, b: a != b,
+        "=>": lambda a, b: (not a) or b,
+        "<=": lambda a, b: a or not b,
+        "=": lambda a, b: a == b,
+    }[op]
+    sv = RuleConverter._create_triplet_sv(op, 1, 2, 3, negated)
+    for values in itertools.product([False, True], repeat=3):
+        x1, x2, x3 = (value != neg for value, neg in zip(values, negated))
+        expected = x1 == truth(x2, x3)
+        assignment = dict(zip((1, 2, 3), values))
+        satisfied = any(all(assignment[k] for k in t.ones) and not any(assignment[k] for k in t.zeros) for t in sv)
+        assert satisfied == expected
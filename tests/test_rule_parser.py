@@ -7,29 +7,32 @@ import pytest
 from vectorlogic.rule_parser import RuleParser
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def variable_map():
     """Provides a sample variable map for testing."""
     return {"x1": 1, "x2": 2, "x3": 3, "x4": 4}
 
 
-def test_parse_single_variable(variable_map):
+@pytest.fixture(scope="module")
+def parser(variable_map):
+    """Provides a RuleParser shared by the tests of the module; parsing does not change it."""
+    return RuleParser(variable_map)
+
+
+def test_parse_single_variable(parser):
     """Tests parsing a single, non-negated variable."""
-    parser = RuleParser(variable_map)
     ast = parser.parse("x1")
     assert ast == ("var", False, "x1")
 
 
-def test_parse_negated_variable(variable_map):
+def test_parse_negated_variable(parser):
     """Tests parsing a single, negated variable."""
-    parser = RuleParser(variable_map)
     ast = parser.parse("!x2")
     assert ast == ("var", True, "x2")
 
 
-def test_parse_simple_binary_operations(variable_map):
+def test_parse_simple_binary_operations(parser):
     """Tests parsing of all simple binary operations."""
-    parser = RuleParser(variable_map)
     operations = ["&&", "||", "^^", "=>", "<=", "=", "!="]
     for op in operations:
         rule = f"x1 {op} x2"
@@ -39,54 +42,48 @@ def test_parse_simple_binary_operations(variable_map):
         assert ast == expected_ast
 
 
-def test_parse_equivalence_operator(variable_map):
+def test_parse_equivalence_operator(parser):
     """Tests parsing of the equivalence operator '<=>'."""
-    parser = RuleParser(variable_map)
     rule = "x1 <=> x2"
     ast = parser.parse(rule)
     expected_ast = ("op", "=", ("var", False, "x1"), ("var", False, "x2"))
     assert ast == expected_ast
 
 
-def test_parse_xor_operator(variable_map):
+def test_parse_xor_operator(parser):
     """Tests parsing of the XOR operator '!='."""
-    parser = RuleParser(variable_map)
     rule = "x1 != x2"
     ast = parser.parse(rule)
     expected_ast = ("op", "^^", ("var", False, "x1"), ("var", False, "x2"))
     assert ast == expected_ast
 
 
-def test_precedence_and_over_or(variable_map):
+def test_precedence_and_over_or(parser):
     """Tests that AND (&&) has higher precedence than OR (||)."""
-    parser = RuleParser(variable_map)
     # Should parse as x1 || (x2 && x3)
     ast = parser.parse("x1 || x2 && x3")
     expected_ast = ("op", "||", ("var", False, "x1"), ("op", "&&", ("var", False, "x2"), ("var", False, "x3")))
     assert ast == expected_ast
 
 
-def test_precedence_or_over_implies(variable_map):
+def test_precedence_or_over_implies(parser):
     """Tests that OR (||) has higher precedence than IMPLIES (=>)."""
-    parser = RuleParser(variable_map)
     # Should parse as (x1 || x2) => x3 because || is higher precedence
     ast = parser.parse("x1 || x2 => x3")
     expected_ast = ("op", "=>", ("op", "||", ("var", False, "x1"), ("var", False, "x2")), ("var", False, "x3"))
     assert ast == expected_ast
 
 
-def test_parentheses_override_precedence(variable_map):
+def test_parentheses_override_precedence(parser):
     """Tests that parentheses correctly override the default operator precedence."""
-    parser = RuleParser(variable_map)
     # Should parse as (x1 || x2) && x3
     ast = parser.parse("(x1 || x2) && x3")
     expected_ast = ("op", "&&", ("op", "||", ("var", False, "x1"), ("var", False, "x2")), ("var", False, "x3"))
     assert ast == expected_ast
 
 
-def test_associativity_of_operators(variable_map):
+def test_associativity_of_operators(parser):
     """Tests the left-to-right associativity of operators at the same precedence level."""
-    parser = RuleParser(variable_map)
 
     # Should parse as (x1 || x2) ^^ x3
     ast_xor = parser.parse("x1 || x2 ^^ x3")
@@ -109,16 +106,14 @@ def test_associativity_of_operators(variable_map):
     assert ast_eq == expected_eq
 
 
-def test_negated_parentheses_raises_error(variable_map):
+def test_negated_parentheses_raises_error(parser):
     """Tests that parsing a negated parenthesized expression raises an error."""
-    parser = RuleParser(variable_map)
     with pytest.raises(ValueError, match="Invalid rule syntax: Negation of expressions in parentheses is not allowed."):
         parser.parse("!(x1 && x2)")
 
 
-def test_complex_rule(variable_map):
+def test_complex_rule(parser):
     """Tests a complex rule with multiple operators, negations, and parentheses."""
-    parser = RuleParser(variable_map)
     rule = "x1 || (!x2 => (x3 ^^ !x4))"
     ast = parser.parse(rule)
     expected_ast = (
@@ -130,16 +125,14 @@ def test_complex_rule(variable_map):
     assert ast == expected_ast
 
 
-def test_undefined_variable_raises_error(variable_map):
+def test_undefined_variable_raises_error(parser):
     """Tests that an undefined variable raises a ValueError."""
-    parser = RuleParser(variable_map)
     with pytest.raises(ValueError, match="Variable 'y1' is not defined in the engine."):
         parser.parse("x1 && y1")
 
 
-def test_mismatched_parentheses_raise_error(variable_map):
+def test_mismatched_parentheses_raise_error(parser):
     """Tests that mismatched parentheses raise a ValueError."""
-    parser = RuleParser(variable_map)
     with pytest.raises(ValueError, match="Invalid rule syntax"):
         parser.parse("(x1 && x2")
 
@@ -147,22 +140,47 @@ def test_mismatched_parentheses_raise_error(variable_map):
         parser.parse("x1 && x2)")
 
 
-def test_invalid_character_raises_error(variable_map):
+def test_invalid_character_raises_error(parser):
     """Tests that an invalid character in the rule string raises a ValueError."""
-    parser = RuleParser(variable_map)
     with pytest.raises(ValueError, match="Invalid rule syntax"):
         parser.parse("x1 # x2")
 
 
-def test_empty_rule_raises_error(variable_map):
+def test_empty_rule_raises_error(parser):
     """Tests that an empty rule string raises a ValueError."""
-    parser = RuleParser(variable_map)
     with pytest.raises(ValueError, match="Cannot parse an empty rule string."):
         parser.parse("")
 
 
-def test_unexpected_tokens_at_end_raise_error(variable_map):
+def test_unexpected_tokens_at_end_raise_error(parser):
     """Tests that extra tokens at the end of a valid rule raise a ValueError."""
-    parser = RuleParser(variable_map)
     with pytest.raises(ValueError, match="Invalid rule syntax"):
         parser.parse("x1 && x2 x3")
+
+
+def test_cached_ast_is_revalidated_against_variable_map(variable_map):
+    """Tests that an AST cached by one parser is still validated by another parser."""
+    rule = "x1 && (x2 || !x4)"
+    ast = RuleParser(variable_map).parse(rule)
+    assert RuleParser(variable_map).parse(rule) == ast
+
+    parser = RuleParser({"x1": 1, "x2": 2})
+    with pytest.raises(ValueError, match="Variable 'x4' is not defined in the engine."):
+        parser.parse(rule)
+
+
+def test_parser_validates_variables_per_instance(variable_map):
+    """Tests that parsers with different variable maps validate the same rule independently."""
+    parser1 = RuleParser(variable_map)
+    parser2 = RuleParser({"y1": 1})
+
+    assert parser2.parse("!y1") == ("var", True, "y1")
+    with pytest.raises(ValueError, match="Variable 'y1' is not defined in the engine."):
+        parser1.parse("x1 => y1")
+
+
+def test_negation_of_parenthesized_variable(parser):
+    """Tests that a variable in parentheses can be negated, and that negations can be stacked."""
+    assert parser.parse("!(x1)") == ("var", True, "x1")
+    assert parser.parse("!!x1") == ("var", False, "x1")
+    assert parser.parse(" x1\n&&\tx2 ") == ("op", "&&", ("var", False, "x1"), ("var", False, "x2"))
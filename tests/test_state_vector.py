@@ -2,9 +2,11 @@
 Tests for the StateVector class.
 """
 
+import itertools
+
 import pytest
 
-from vectorlogic.state_vector import StateVector
+from vectorlogic.state_vector import StateVector, _multiply_t_objects, clear_product_cache
 from vectorlogic.t_object import TObject
 
 
@@ -155,6 +157,54 @@ def test_state_vector_multiplication():
     assert product == expected_sv
 
 
+def test_state_vector_hash_is_order_independent():
+    """Tests that equal StateVectors have equal hashes regardless of order."""
+    t1 = TObject(ones={1})
+    t2 = TObject(zeros={2})
+    assert hash(StateVector([t1, t2])) == hash(StateVector([t2, t1]))
+
+
+def test_state_vector_product_cache():
+    """Tests that repeated products are served from the product cache."""
+    clear_product_cache()
+    sv1 = StateVector([TObject(ones={1}), TObject(zeros={2})])
+    sv2 = StateVector([TObject(ones={3}), TObject(zeros={4})])
+
+    product = sv1 * sv2
+    # Same operands in a different order and as new instances hit the cache.
+    assert StateVector([TObject(zeros={4}), TObject(ones={3})]) * sv1 is product
+
+    clear_product_cache()
+    assert sv1 * sv2 is not product
+    assert sv1 * sv2 == product
+
+
+def test_state_vector_multiplication_to_contradiction():
+    """Tests that a product in which every pair of TObjects conflicts is a contradiction."""
+    sv1 = StateVector([TObject(ones={1}), TObject(ones={2})])
+    sv2 = StateVector([TObject(zeros={1, 2})])
+    assert (sv1 * sv2).is_contradiction()
+    assert (sv2 * sv1).to_string() == "{ Contradiction }"
+
+
+def test_multiply_t_objects_matches_pairwise_products():
+    """Tests that the blocked product kernel agrees with the pairwise TObject product."""
+    t_objects1 = [TObject(ones={1, 2}), TObject(zeros={1}, ones={5}), TObject(is_null=True), TObject(zeros={2, 3})]
+    t_objects2 = [TObject(ones={1}), TObject(zeros={2}, ones={4}), TObject(ones={2}, zeros={1}), TObject(ones={6})]
+
+    expected = [t1 * t2 for t1 in t_objects1 for t2 in t_objects2]
+    expected = [t for t in expected if not t.is_null]
+    assert _multiply_t_objects(t_objects1, t_objects2) == expected
+    assert _multiply_t_objects(t_objects1, []) == []
+    for single in ([TObject(ones={2}, zeros={3})], [TObject(zeros={2})]):
+        assert _multiply_t_objects(t_objects1, single) == [
+            t * single[0] for t in t_objects1 if not (t * single[0]).is_null
+        ]
+        assert _multiply_t_objects(single, t_objects2) == [
+            single[0] * t for t in t_objects2 if not (single[0] * t).is_null
+        ]
+
+
 def test_state_vector_reduce_basic():
     """Tests a basic reduction in StateVector."""
     t1 = TObject(ones={1}, zeros={2, 3})
@@ -204,6 +254,32 @@ def test_state_vector_sequential_reductions():
     assert len(sv._t_objects) == 3  # Original is unchanged
 
 
+def test_state_vector_reduction_of_large_groups():
+    """Tests adjacency reduction when many TObjects share a pivot set."""
+    num_vars = 8
+    t_objects = [
+        TObject(ones={i + 1 for i in range(num_vars) if bits[i]}, zeros={i + 1 for i in range(num_vars) if not bits[i]})
+        for bits in itertools.product([0, 1], repeat=num_vars)
+    ]
+    assert StateVector(t_objects).simplify(max_num_iter=None) == StateVector([TObject()])
+
+    # Without the states where v1 and v2 are both 1, the rest reduces to (v1 = 0) or (v1 = 1, v2 = 0).
+    partial = StateVector([t for t in t_objects if not {1, 2} <= t.ones]).simplify(max_num_iter=None)
+    assert partial == StateVector([TObject(zeros={1}), TObject(ones={1}, zeros={2})])
+
+
+def test_subsumption_reduction_of_large_state_vectors():
+    """Tests that large state vectors drop subsumed and repeated TObjects, keeping the order."""
+    specific = [TObject(ones={1, i}, zeros={2}) for i in range(3, 100)]
+    general = [TObject(ones={200}), TObject(ones={1}, zeros={2})]
+    sv = StateVector(general[:1] + specific + general[1:] + specific[:5] + general[:1])
+    assert sv.size() > 64
+
+    reduced_sv, was_modified = sv._subsumption_reduction()
+    assert was_modified
+    assert list(reduced_sv) == general
+
+
 def test_state_vector_full_reduction():
     """Tests both subsumption and adjacency reduction in StateVector."""
     # t2 is a superset of t1, so t2 should be removed by subsumption
@@ -380,6 +456,13 @@ def test_var_value_empty_vector():
         sv.var_value(1)
 
 
+def test_var_value_null_tobject():
+    """Tests that var_value raises when a later TObject is null."""
+    sv = StateVector([TObject(ones={1}), TObject(is_null=True)])
+    with pytest.raises(ValueError, match="Cannot determine variable value for a null TObject"):
+        sv.var_value(1)
+
+
 def test_var_value_single_tobject():
     """Tests var_value on a StateVector with a single TObject."""
     sv_one = StateVector([TObject(ones={1})])
@@ -453,3 +536,11 @@ def test_state_vector_iteration_and_indexing():
     # Test that it raises an IndexError for out-of-bounds access
     with pytest.raises(IndexError):
         _ = sv[3]
+
+
+def test_pivot_mask_matches_pivot_set():
+    """Tests that the pivot mask of a StateVector has the bits of its pivot set."""
+    sv = StateVector([TObject(ones={1}, zeros={4}), TObject(ones={2, 65})])
+    assert sv.pivot_mask() == sum(1 << i for i in sv.pivot_set())
+    assert sv.pivot_set() == {1, 2, 4, 65}
+    assert StateVector().pivot_mask() == 0
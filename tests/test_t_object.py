@@ -2,9 +2,11 @@
 Tests for the TObject class.
 """
 
+import copy
+
 import pytest
 
-from vectorlogic.t_object import TObject
+from vectorlogic.t_object import TObject, _popcount
 
 
 def test_t_object_default_initialization():
@@ -52,6 +54,20 @@ def test_null_initialization():
     assert t_obj.zeros == frozenset()
 
 
+def test_trivial_and_null_objects_are_shared():
+    """Tests that the trivial and null TObjects are interned, and survive copying."""
+    assert TObject() is TObject()
+    assert TObject(is_null=True) is TObject(is_null=True)
+    assert TObject() is not TObject(is_null=True)
+    assert (TObject(ones={1}) * TObject(zeros={1})) is TObject(is_null=True)
+
+    assert copy.copy(TObject()) is TObject()
+    assert copy.deepcopy(TObject(is_null=True)) is TObject(is_null=True)
+    t_obj = TObject(ones={1, 2}, zeros={3})
+    assert copy.copy(t_obj) == t_obj
+    assert not TObject().is_null
+
+
 def test_invalid_initialization_raises_error():
     """
     Tests that a ValueError is raised when providing 'ones' or 'zeros'
@@ -68,6 +84,64 @@ def test_invalid_initialization_raises_error():
         TObject(ones={1}, zeros={2}, is_null=True)
 
 
+def test_negative_index_raises_error():
+    """Tests that negative variable indices are rejected."""
+    with pytest.raises(ValueError):
+        TObject(ones={-1})
+
+    with pytest.raises(ValueError):
+        TObject(ones={1}, zeros={-2})
+
+
+def test_popcount():
+    """Tests the bit counting helper used on the constraint bitmasks."""
+    assert _popcount(0) == 0
+    assert _popcount(0b1011) == 3
+    assert _popcount(TObject(ones=[1, 5, 70], zeros=[2])._ones_mask) == 3
+
+
+def test_derived_t_objects_keep_consistent_bitmasks():
+    """Tests that TObjects built by operations have the same bitmasks as freshly constructed ones."""
+    t1 = TObject(ones={1, 3}, zeros={2})
+    t2 = TObject(ones={4}, zeros={5})
+    derived = [
+        t1 * t2,
+        t1.negate_variables([2, 3, 7]),
+        t1.remove_variables(3),
+        TObject(ones={1, 2}).reduce(TObject(ones={1}, zeros={2})),
+    ]
+    for t_obj in derived:
+        fresh = TObject(ones=t_obj.ones, zeros=t_obj.zeros)
+        assert (t_obj._ones_mask, t_obj._zeros_mask) == (fresh._ones_mask, fresh._zeros_mask)
+        assert t_obj == fresh and hash(t_obj) == hash(fresh)
+
+    # Operations on unconstrained variables return the TObject itself.
+    assert t1.remove_variables([4, 5]) is t1
+    assert t1.negate_variables(6) is t1
+
+
+def test_derived_t_objects_decode_their_bitmasks():
+    """Tests that the sets of TObjects built from bitmasks are decoded on access."""
+    t_obj = TObject(ones={1, 3}, zeros={2}) * TObject(ones={64, 200}, zeros={0})
+    assert t_obj.ones == frozenset({1, 3, 64, 200})
+    assert t_obj.zeros == frozenset({0, 2})
+    assert t_obj.pivot_set == frozenset({0, 1, 2, 3, 64, 200})
+    assert [t_obj.var_value(i) for i in (0, 1, 4, 200, -1)] == [0, 1, -1, 1, -1]
+    assert not t_obj.is_trivial
+    assert (TObject(ones={1}) * TObject()).reduce(TObject(zeros={1})).is_trivial
+
+
+def test_constructor_accepts_any_iterable():
+    """Tests that the constructor packs iterators and duplicates, and nulls conflicts."""
+    t_obj = TObject(ones=iter([2, 2, 5]), zeros=(i for i in [7]))
+    assert t_obj.ones == frozenset({2, 5})
+    assert t_obj.zeros == frozenset({7})
+
+    t_conflict = TObject(ones=iter([1, 2]), zeros=[2])
+    assert t_conflict.is_null
+    assert t_conflict.ones == frozenset() and t_conflict.zeros == frozenset()
+
+
 def test_properties():
     """Tests the property getters."""
     ones = {1, 10}
@@ -107,6 +181,8 @@ def test_to_string_method():
     assert TObject(ones={2, 6}, zeros={3}).to_string(max_index=4) == "- 1 0 -"
     assert TObject(ones={3}).to_string() == "- - 1"
     assert TObject(zeros={2, 4}).to_string() == "- 0 - 0"
+    assert TObject(ones={0, 2}).to_string() == "- 1"
+    assert TObject(ones={70}, zeros={1}).to_string() == " ".join(["0"] + ["-"] * 68 + ["1"])
 
 
 def test_multiplication():
@@ -139,6 +215,18 @@ def test_multiplication():
     assert res_idem == t_a
 
 
+def test_multiplication_returns_dominating_operand():
+    """Tests that a product equal to one of the operands is that operand."""
+    t_a = TObject(ones={1, 2}, zeros={3, 4})
+    t_sub = TObject(ones={2}, zeros={4})
+
+    assert (t_a * TObject()) is t_a
+    assert (TObject() * t_a) is t_a
+    assert (t_a * t_sub) is t_a
+    assert (t_sub * t_a) is t_a
+    assert (t_a * TObject(ones={5})) is not t_a
+
+
 def test_reduction():
     """Tests the reduce method for TObjects."""
     t1 = TObject(ones={1, 2}, zeros={3})
@@ -283,3 +371,34 @@ def test_to_dict():
     partial_map = {1: "a", 2: "b"}
     expected_partial = {"a": True, "b": False}
     assert t_obj_more_vars.to_dict(partial_map) == expected_partial
+
+
+def test_pivot_mask():
+    """Tests that the pivot mask has the bits of the pivot set."""
+    t_obj = TObject(ones={1, 70}, zeros={3})
+    assert t_obj.pivot_mask == (1 << 1) | (1 << 3) | (1 << 70)
+    assert TObject().pivot_mask == 0
+    assert TObject(is_null=True).pivot_mask == 0
+
+
+def test_ones_and_zeros_masks():
+    """Tests that the ones and zeros masks have the bits of the ones and zeros sets."""
+    t_obj = TObject(ones={1, 70}, zeros={3})
+    assert t_obj.ones_mask == (1 << 1) | (1 << 70)
+    assert t_obj.zeros_mask == 1 << 3
+    assert TObject(ones={2}, zeros={2}).ones_mask == 0
+
+
+def test_ordering_follows_sorted_indices():
+    """Tests that TObjects are ordered by their sorted 'ones', then 'zeros' indices."""
+    t_null = TObject(is_null=True)
+    t_a = TObject(ones={1, 5})
+    t_b = TObject(ones={2})
+    t_c = TObject(ones={1})
+    t_d = TObject(ones={1}, zeros={3})
+
+    assert t_null < t_c and not t_c < t_null and not t_null < t_null
+    assert t_a < t_b  # [1, 5] < [2]
+    assert t_c < t_a  # [1] is a prefix of [1, 5]
+    assert t_c < t_d and not t_d < t_c
+    assert sorted([t_b, t_d, t_a, t_null, t_c]) == [t_null, t_c, t_d, t_a, t_b]
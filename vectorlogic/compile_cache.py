@@ -0,0 +1,158 @@
+"""
+On-disk cache for compiled valid sets.
+
+This module provides the helpers used by `Engine.compile()` to persist a
+compiled `StateVector` and to reuse it when the same knowledge base is compiled
+again. A cache entry is keyed by a hash of the content of the state vectors
+being compiled, so rules, evidence and custom state vectors are all covered.
+Entries are stored as `.npz` files holding two bit-packed boolean matrices
+(one row per `TObject`) and the null flag of every row, which avoids pickling.
+"""
+
+import hashlib
+import os
+import zipfile
+import zlib
+from typing import Dict, Iterable, Optional, Union
+
+import numpy as np
+
+from .state_vector import StateVector
+from .t_object import TObject
+
+CACHE_DIR_ENV_VAR = "VECTORLOGIC_CACHE_DIR"
+
+_CACHE_FORMAT_VERSION = 3
+
+# The errors raised by `np.load` and `load_state_vector` for a corrupt or truncated entry.
+_LOAD_ERRORS = (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile, zlib.error)
+
+
+def compute_cache_key(
+    state_vectors: Iterable[StateVector],
+    variables: Iterable[str],
+    opt_config: Dict[str, Union[float, int, str]],
+) -> str:
+    """
+    Compute the cache key of a compilation.
+
+    Parameters
+    ----------
+    state_vectors : Iterable[StateVector]
+        The state vectors to be multiplied, in compilation order.
+    variables : Iterable[str]
+        The sorted variable names of the engine.
+    opt_config : Dict[str, Union[float, int, str]]
+        The optimisation hyper-parameters used for the compilation.
+
+    Returns
+    -------
+    str
+        A hexadecimal blake2b digest identifying the compilation.
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(f"v{_CACHE_FORMAT_VERSION}|{','.join(variables)}|".encode())
+    digest.update(repr(sorted(opt_config.items())).encode())
+    for sv in state_vectors:
+        digest.update(b"|sv")
+        for t_obj in sv:
+            # The null and the trivial TObject both have empty masks, so the null flag is hashed too.
+            digest.update(f";{int(t_obj.is_null)}:{t_obj.ones_mask:x},{t_obj.zeros_mask:x}".encode())
+    return digest.hexdigest()
+
+
+def save_state_vector(path: str, state_vector: StateVector):
+    """
+    Save a state vector as bit-packed `ones` and `zeros` matrices.
+
+    Null TObjects are stored as empty rows flagged in a separate `is_null` array,
+    so the loaded state vector equals the saved one.
+    The matrices have one column per index up to the largest index of the state
+    vector, which may exceed the number of engine variables when custom state
+    vectors are added. The file is written to a temporary name first and then
+    moved into place, so concurrent readers never see a partially written entry.
+
+    Parameters
+    ----------
+    path : str
+        The destination `.npz` file.
+    state_vector : StateVector
+        The state vector to save.
+    """
+    t_objects = list(state_vector)
+    num_columns = max(state_vector.pivot_mask().bit_length(), 1)
+    ones = np.zeros((len(t_objects), num_columns), dtype=bool)
+    zeros = np.zeros_like(ones)
+    for row, t_obj in enumerate(t_objects):
+        ones[row, list(t_obj.ones)] = True
+        zeros[row, list(t_obj.zeros)] = True
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez_compressed(
+            f,
+            ones=np.packbits(ones, axis=1),
+            zeros=np.packbits(zeros, axis=1),
+            is_null=np.array([t_obj.is_null for t_obj in t_objects], dtype=bool),
+            num_columns=np.array(num_columns),
+        )
+    os.replace(tmp_path, path)
+
+
+def load_state_vector(path: str) -> StateVector:
+    """
+    Load a state vector saved by `save_state_vector`.
+
+    Parameters
+    ----------
+    path : str
+        The `.npz` file to read.
+
+    Returns
+    -------
+    StateVector
+        The restored state vector.
+    """
+    with np.load(path, allow_pickle=False) as data:
+        num_columns = int(data["num_columns"])
+        ones = np.unpackbits(data["ones"], axis=1, count=num_columns).astype(bool)
+        zeros = np.unpackbits(data["zeros"], axis=1, count=num_columns).astype(bool)
+        is_null = data["is_null"]
+    t_objects = [
+        (
+            TObject(is_null=True)
+            if null_row
+            else TObject(ones=np.flatnonzero(ones_row).tolist(), zeros=np.flatnonzero(zeros_row).tolist())
+        )
+        for ones_row, zeros_row, null_row in zip(ones, zeros, is_null)
+    ]
+    return StateVector(t_objects)
+
+
+def load_cached_state_vector(path: str) -> Optional[StateVector]:
+    """
+    Load a cache entry, or return None if there is no usable entry at `path`.
+
+    An entry that cannot be read (e.g. a corrupt or truncated file) is deleted,
+    so that it is replaced by the next compilation instead of failing it.
+
+    Parameters
+    ----------
+    path : str
+        The `.npz` file to read.
+
+    Returns
+    -------
+    Optional[StateVector]
+        The restored state vector, or None if the entry is missing or unreadable.
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        return load_state_vector(path)
+    except _LOAD_ERRORS:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return None
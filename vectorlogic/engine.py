@@ -6,12 +6,13 @@ process of rule management, compilation, and inference. It also defines
 the `InferenceResult` class for handling the outcomes of predictions.
 """
 
+import os
 import re
 from typing import Dict, List, Optional, Tuple, Union, Iterable
 
 import numpy as np
 
-from . import helpers
+from . import compile_cache, helpers
 from .rule_converter import RuleConverter
 from .state_vector import StateVector
 from .t_object import TObject
@@ -182,8 +183,13 @@ class Engine:
         Is None until `compile()` is called.
     _is_compiled : bool
         A flag indicating whether the engine has a compiled valid set.
+    _predict_index : Optional[Tuple[List[TObject], int, Dict[int, Tuple[int, int]]]]
+        A lookup table of the valid set used by `predict`, built on demand.
+        See `_build_predict_index` for details.
     """
 
+    MULTIPLICATION_ORDERS = ("heuristic", "greedy", "left-to-right")
+
     def __init__(
         self,
         variables: List[str],
@@ -196,6 +202,8 @@ class Engine:
         self._name: Optional[str] = name
         self._variable_map: Dict[str, int] = {var: i + 1 for i, var in enumerate(self._variables)}
         self._index_to_name: Dict[int, str] = {v: k for k, v in self._variable_map.items()}
+        # The variables are fixed for the lifetime of the engine, so one converter serves all rules.
+        self._converter = RuleConverter(self._variable_map)
         self._verbose = verbose
 
         if self._verbose > 0:
@@ -207,6 +215,7 @@ class Engine:
         self._state_vectors: List[StateVector] = []
         self._valid_set: Optional[StateVector] = None
         self._is_compiled: bool = False
+        self._predict_index: Optional[Tuple[List[TObject], int, Dict[int, Tuple[int, int]]]] = None
 
         # --- Debugging & History ---
         self._compiled_rules: List[str] = []
@@ -218,6 +227,7 @@ class Engine:
         self._opt_predator_threshold: float = 1.2
         self._opt_max_predator_size: int = 2
         self._opt_max_cluster_size: int = 2
+        self._opt_order: str = "heuristic"
         # --- End ---
 
         for rule in rules or []:
@@ -291,13 +301,14 @@ class Engine:
         }
 
     @property
-    def opt_config(self) -> Dict[str, Union[float, int]]:
+    def opt_config(self) -> Dict[str, Union[float, int, str]]:
         """Returns a dictionary of the current optimisation hyper-parameters."""
         return {
             "predator_base": self._opt_predator_base,
             "predator_threshold": self._opt_predator_threshold,
             "max_predator_size": self._opt_max_predator_size,
             "max_cluster_size": self._opt_max_cluster_size,
+            "order": self._opt_order,
         }
 
     @property
@@ -392,8 +403,7 @@ class Engine:
         if self._verbose > 0:
             print(f'Adding rule: "{rule_string}"')
         self._uncompiled_rules.append(rule_string)
-        converter = RuleConverter(self._variable_map)
-        state_vector = converter.convert(rule_string)
+        state_vector = self._converter.convert(rule_string)
         self._state_vectors.append(state_vector)
         self._is_compiled = False
 
@@ -440,7 +450,7 @@ class Engine:
         self._state_vectors.append(state_vector)
         self._is_compiled = False
 
-    def compile(self):
+    def compile(self, order: Optional[str] = None, cache_dir: Optional[str] = None):
         """
         Compiles all uncompiled rules into the engine's 'valid set'.
 
@@ -448,7 +458,30 @@ class Engine:
         with the existing `_valid_set` (if any), and stores the final result.
         The list of uncompiled vectors is then cleared. This is an explicit,
         user-driven action.
+
+        Parameters
+        ----------
+        order : str, optional
+            The multiplication order strategy, one of `MULTIPLICATION_ORDERS`.
+            If None, the engine's `opt_config["order"]` is used (defaults to
+            "heuristic"). See `multiply_all_vectors` for details.
+        cache_dir : str, optional
+            A directory for the on-disk cache of compiled valid sets. If None,
+            the `VECTORLOGIC_CACHE_DIR` environment variable is used; if that
+            is not set either, no cache is used.
+
+        Notes
+        -----
+        The cache is keyed by the content of the state vectors being compiled,
+        the engine variables and `opt_config`. On a cache hit the multiplication
+        is skipped and no intermediate sizes are recorded.
         """
+        opt_config = self.opt_config
+        if order is not None:
+            opt_config["order"] = order
+        if opt_config["order"] not in self.MULTIPLICATION_ORDERS:
+            raise ValueError(f"Unknown multiplication order '{opt_config['order']}'.")
+
         if self._is_compiled:
             if self._verbose > 0:
                 print("Engine.compile(): Engine already compiled.")
@@ -463,6 +496,7 @@ class Engine:
 
         def _finalize_compilation():
             self._is_compiled = True
+            self._predict_index = None
             self._compiled_rules.extend(self._uncompiled_rules)
             self._uncompiled_rules.clear()
             self._state_vectors.clear()
@@ -475,9 +509,28 @@ class Engine:
             _finalize_compilation()
             return
 
-        valid_set, int_sizes = self.multiply_all_vectors(all_svs, self.opt_config, verbose=self._verbose)
+        if cache_dir is None:
+            cache_dir = os.environ.get(compile_cache.CACHE_DIR_ENV_VAR)
+        cache_path = None
+        if cache_dir:
+            cache_dir = os.path.expanduser(cache_dir)
+            cache_key = compile_cache.compute_cache_key(all_svs, self._variables, opt_config)
+            cache_path = os.path.join(cache_dir, f"{cache_key}.npz")
+            cached_sv = compile_cache.load_cached_state_vector(cache_path)
+            if cached_sv is not None:
+                if self._verbose > 0:
+                    print(f"Engine.compile(): Loaded compiled valid set from {cache_path}")
+                self._valid_set = cached_sv
+                _finalize_compilation()
+                return
+
+        valid_set, int_sizes = self.multiply_all_vectors(all_svs, opt_config, verbose=self._verbose)
         self._valid_set = valid_set.simplify()
         self._intermediate_sizes.extend(int_sizes)
+
+        if cache_path is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+            compile_cache.save_state_vector(cache_path, self._valid_set)
         _finalize_compilation()
 
     def predict(self, evidence: Dict[str, bool]) -> InferenceResult:
@@ -506,14 +559,41 @@ class Engine:
         For example, providing the evidence `{x1: True, x2: False}` is
         the same as temporarily adding the rule `x1 && !x2` for this
         calculation.
+
+        The evidence is multiplied into every state vector that shares
+        variables with it before the remaining vectors are combined, and
+        the inference stops as soon as one of them becomes a contradiction.
+        If the engine is compiled and has no pending rules, the rows of the
+        valid set compatible with the evidence are instead looked up in a
+        precomputed index (see `_build_predict_index`).
         """
         ones = {self._variable_map[var] for var, val in evidence.items() if val}
         zeros = {self._variable_map[var] for var, val in evidence.items() if not val}
-        evidence_sv = StateVector([TObject(ones=ones, zeros=zeros)])
+        evidence_t_obj = TObject(ones=ones, zeros=zeros)
 
+        if not self._state_vectors and self._valid_set is not None:
+            return self._predict_compiled(evidence_t_obj)
+
+        evidence_sv = StateVector([evidence_t_obj])
         all_svs = self._state_vectors.copy()
         if self._valid_set is not None:
             all_svs.append(self._valid_set)
+
+        # Condition every vector that shares variables with the evidence before
+        # the full multiplication. This shrinks the factors early and exposes a
+        # contradiction before any large product is built.
+        conditioning_sizes = []
+        evidence_pivot_mask = evidence_t_obj.pivot_mask
+        for i, sv in enumerate(all_svs):
+            if not evidence_pivot_mask & sv.pivot_mask():
+                continue
+            all_svs[i] = sv * evidence_sv
+            conditioning_sizes.append(all_svs[i].size())
+            if all_svs[i].is_contradiction():
+                if self._verbose > 0:
+                    print("Engine.predict(): Evidence contradicts the rules.")
+                self._intermediate_sizes = conditioning_sizes
+                return InferenceResult(StateVector(), self._variable_map)
         all_svs.append(evidence_sv)
 
         if self._verbose == 1:
@@ -525,9 +605,141 @@ class Engine:
         if self._verbose > 0:
             print(f"Engine.predict(): Multiplication finished. Final state vector size = {result_sv.size()}")
 
-        self._intermediate_sizes = int_sizes
+        self._intermediate_sizes = conditioning_sizes + int_sizes
+        return InferenceResult(result_sv, self._variable_map)
+
+    def _build_predict_index(self) -> Tuple[List[TObject], int, Dict[int, Tuple[int, int]]]:
+        """
+        Build the lookup table of the valid set used by `_predict_compiled`.
+
+        The rows of the valid set are numbered, and a set of rows is packed
+        into an integer bitmask (bit `i` is set if row `i` is in the set).
+
+        Returns
+        -------
+        Tuple[List[TObject], int, Dict[int, Tuple[int, int]]]
+            - The non-null rows of the valid set.
+            - The bitmask of all rows.
+            - A mapping from each constrained variable index to the bitmasks
+              of rows compatible with the variable being True and False,
+              respectively. Unconstrained variables are omitted.
+        """
+        t_objects = [t_obj for t_obj in self.valid_set if not t_obj.is_null]
+        rows_with_one: Dict[int, int] = {}
+        rows_with_zero: Dict[int, int] = {}
+        for row, t_obj in enumerate(t_objects):
+            row_bit = 1 << row
+            for i in t_obj.ones:
+                rows_with_one[i] = rows_with_one.get(i, 0) | row_bit
+            for i in t_obj.zeros:
+                rows_with_zero[i] = rows_with_zero.get(i, 0) | row_bit
+
+        all_rows = (1 << len(t_objects)) - 1
+        index = {
+            i: (all_rows & ~rows_with_zero.get(i, 0), all_rows & ~rows_with_one.get(i, 0))
+            for i in rows_with_one.keys() | rows_with_zero.keys()
+        }
+        return t_objects, all_rows, index
+
+    def _predict_compiled(self, evidence_t_obj: TObject) -> InferenceResult:
+        """
+        Condition the compiled valid set on the evidence using the predict index.
+
+        The rows compatible with the evidence are found with one AND per
+        evidence variable, and only those rows are multiplied by the evidence.
+
+        Parameters
+        ----------
+        evidence_t_obj : TObject
+            The evidence as a TObject.
+
+        Returns
+        -------
+        InferenceResult
+            A result object wrapping the conditioned valid set.
+        """
+        if self._predict_index is None:
+            self._predict_index = self._build_predict_index()
+        t_objects, rows, index = self._predict_index
+
+        for i in evidence_t_obj.ones:
+            if i in index:
+                rows &= index[i][0]
+        for i in evidence_t_obj.zeros:
+            if i in index:
+                rows &= index[i][1]
+
+        new_t_objects = []
+        while rows:
+            row_bit = rows & -rows
+            new_t_objects.append(t_objects[row_bit.bit_length() - 1] * evidence_t_obj)
+            rows ^= row_bit
+        result_sv = StateVector(new_t_objects).simplify()
+
+        if self._verbose > 0:
+            print(f"Engine.predict(): Valid set conditioned on evidence. Final state vector size = {result_sv.size()}")
+        self._intermediate_sizes = [result_sv.size()]
         return InferenceResult(result_sv, self._variable_map)
 
+    def predict_batch(self, evidences: List[Dict[str, bool]]) -> List[InferenceResult]:
+        """
+        Calculates inference results for a batch of evidence dictionaries.
+
+        The result for each evidence is logically equivalent to calling
+        `predict(evidence)`, and the engine's state is not altered.
+
+        Parameters
+        ----------
+        evidences : List[Dict[str, bool]]
+            A list of evidence dictionaries, each mapping variable names to
+            their boolean values.
+
+        Returns
+        -------
+        List[InferenceResult]
+            One inference result per evidence, in the same order.
+
+        Notes
+        -----
+        If the engine is compiled and has no pending rules, the valid set is
+        the only factor, and its compatibility with all evidences is computed
+        at once: the rows of the valid set and the evidences are encoded as
+        `ones`/`zeros` indicator matrices, and a row is compatible with an
+        evidence unless it fixes a variable to the opposite value. Otherwise,
+        this falls back to calling `predict` for each evidence.
+        """
+        if self._state_vectors or self._valid_set is None or not evidences:
+            return [self.predict(evidence) for evidence in evidences]
+
+        # The valid set rows hold their 1s in the first `num_columns` columns and their 0s in the
+        # next ones. The evidences are stored column-wise, with their 0s first, so that the
+        # conflicts of all rows with all evidences are a single matrix product without a transpose.
+        num_columns = len(self._variables) + 1
+        evidence_t_objs = []
+        evidence_matrix = np.zeros((2 * num_columns, len(evidences)), dtype=np.float32)
+        for col, evidence in enumerate(evidences):
+            ones = [self._variable_map[var] for var, val in evidence.items() if val]
+            zeros = [self._variable_map[var] for var, val in evidence.items() if not val]
+            evidence_t_objs.append(TObject(ones=ones, zeros=zeros))
+            evidence_matrix[zeros, col] = 1
+            evidence_matrix[[num_columns + i for i in ones], col] = 1
+
+        t_objects = [t_obj for t_obj in self._valid_set if not t_obj.is_null]
+        valid_matrix = np.zeros((len(t_objects), 2 * num_columns), dtype=np.float32)
+        for row, t_obj in enumerate(t_objects):
+            valid_matrix[row, list(t_obj.ones)] = 1
+            valid_matrix[row, [num_columns + i for i in t_obj.zeros]] = 1
+
+        # conflicts[i, k] > 0 if row i of the valid set contradicts evidence k.
+        conflicts = valid_matrix @ evidence_matrix
+
+        results = []
+        for k, evidence_t_obj in enumerate(evidence_t_objs):
+            compatible_rows = np.flatnonzero(conflicts[:, k] == 0)
+            result_sv = StateVector([t_objects[i] * evidence_t_obj for i in compatible_rows]).simplify()
+            results.append(InferenceResult(result_sv, self._variable_map))
+        return results
+
     def get_variable_value(self, variable_name: str) -> Optional[int]:
         """
         Gets a variable's value from the compiled 'valid set'.
@@ -736,17 +948,26 @@ class Engine:
 
         Notes
         -----
-        This method uses a hybrid heuristic strategy:
+        The strategy is selected by `opt_config["order"]`. The default,
+        "heuristic", uses a hybrid strategy:
         1. It first attempts to find a "predator-prey" relationship, where one
            vector is likely to significantly shrink several others.
         2. If no suitable predator is found, it falls back to a clustering
            strategy based on Jaccard similarity of pivot sets.
+
+        Duplicate state vectors (e.g. produced by different rule strings with
+        the same meaning) are multiplied only once.
+
+        The "greedy" strategy always multiplies the pair with the smallest
+        estimated product size (see `helpers.find_greedy_pair`), and
+        "left-to-right" multiplies the vectors in the given order.
         """
         # --- Unpack optimisation parameters ---
         predator_base = opt_config.get("predator_base", 0.6)
         predator_threshold = opt_config.get("predator_threshold", 1.2)
         max_predator_size = opt_config.get("max_predator_size", 2)
         max_cluster_size = opt_config.get("max_cluster_size", 2)
+        order = opt_config.get("order", "heuristic")
         # --- End Unpack ---
 
         # --- Handle simple cases and perform initial cleanup ---
@@ -758,6 +979,8 @@ class Engine:
                 return StateVector(), [0]  # Early exit
             if not sv.is_trivial():
                 remaining_svs.append(sv)
+        # Identical vectors are idempotent factors (A * A = A), so only one copy is kept.
+        remaining_svs = list(dict.fromkeys(remaining_svs))
 
         if not remaining_svs:
             return StateVector([TObject()]), [1]  # All were trivial
@@ -774,10 +997,42 @@ class Engine:
                 print(f"\r{' ' * 120}\r", end="")
 
         intermediate_sizes = []
+
+        if order == "left-to-right":
+            product_sv = remaining_svs[0]
+            for sv in remaining_svs[1:]:
+                product_sv *= sv
+                intermediate_sizes.append(product_sv.size())
+                if product_sv.is_contradiction():
+                    return StateVector(), intermediate_sizes
+            return product_sv, intermediate_sizes
+
         pivot_sets = [sv.pivot_set() for sv in remaining_svs]
         sv_sizes = [sv.size() for sv in remaining_svs]  # sizes of state vectors
         union_sizes, intersection_sizes = helpers.calc_ps_unions_intersections(pivot_sets)
 
+        if order == "greedy":
+            while True:
+                i, j = helpers.find_greedy_pair(sv_sizes, union_sizes, intersection_sizes, base=predator_base)
+                product_sv = remaining_svs[i] * remaining_svs[j]
+                intermediate_sizes.append(product_sv.size())
+                if product_sv.is_contradiction():
+                    return StateVector(), intermediate_sizes
+
+                is_finished, remaining_svs, pivot_sets, sv_sizes, union_sizes, intersection_sizes = (
+                    Engine._update_multiplication_state(
+                        remaining_svs,
+                        pivot_sets,
+                        sv_sizes,
+                        union_sizes,
+                        intersection_sizes,
+                        indices_to_remove=[i, j],
+                        new_products=[product_sv],
+                    )
+                )
+                if is_finished:
+                    return remaining_svs[0], intermediate_sizes
+
         # ===== PREDATOR-PREY HEURISTIC ==============
         max_num_predator_prey_loops = (np.array(sv_sizes) <= max_predator_size).sum()
         counter = 0
@@ -7,10 +7,23 @@ multiplication strategy in the main engine, aiming to reduce the size of
 intermediate results.
 """
 
+from itertools import chain
 from typing import List, Tuple, Optional
 
 import numpy as np
 
+_UINT8_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def _bitwise_count_lookup(packed: np.ndarray) -> np.ndarray:
+    """Return the number of set bits of every element of a contiguous uint64 array."""
+    byte_counts = _UINT8_POPCOUNT[packed.view(np.uint8)]
+    return byte_counts.reshape(packed.shape + (8,)).sum(axis=-1, dtype=np.uint8)
+
+
+# `np.bitwise_count` is only available from NumPy 2.0 on.
+_bitwise_count = getattr(np, "bitwise_count", _bitwise_count_lookup)
+
 
 def calc_ps_unions_intersections(pivot_sets: List[set[int]]) -> Tuple[np.ndarray, np.ndarray]:
     """
@@ -45,20 +58,29 @@ def calc_ps_unions_intersections(pivot_sets: List[set[int]]) -> Tuple[np.ndarray
         return np.zeros((num_svs, num_svs), dtype=int), np.zeros((num_svs, num_svs), dtype=int)
 
     # 1. Create a boolean matrix where rows are pivot sets and columns are variables
-    presence_matrix = np.zeros((num_svs, max_idx), dtype=bool)
-    for i, p_set in enumerate(pivot_sets):
-        if p_set:
-            # Variable indices are 1-based, so we subtract 1 for 0-based NumPy indexing
-            indices = np.array(list(p_set)) - 1
-            presence_matrix[i, indices] = True
-
-    # 2. Calculate intersection sizes using matrix multiplication
-    # The dot product of the boolean matrix with its transpose gives the intersection sizes.
-    intersection_sizes = presence_matrix.astype(np.int32) @ presence_matrix.astype(np.int32).T
+    # The columns are padded to a multiple of 64, so that every row packs into whole uint64 words.
+    presence_matrix = np.zeros((num_svs, -(-max_idx // 64) * 64), dtype=bool)
+    # All entries are set in one scatter, without an intermediate array per pivot set.
+    set_sizes = [len(p_set) for p_set in pivot_sets]
+    rows = np.repeat(np.arange(num_svs), set_sizes)
+    columns = np.fromiter(chain.from_iterable(pivot_sets), dtype=np.intp, count=len(rows))
+    # Variable indices are 1-based, so we subtract 1 for 0-based NumPy indexing
+    presence_matrix[rows, columns - 1] = True
+
+    # 2. Calculate intersection sizes on the bit-packed rows
+    # Every row is packed into uint64 words (64 variables per word), so the intersection
+    # of two pivot sets is the popcount of the AND of their packed rows. The matrix is
+    # symmetric, so only the upper triangle is computed and then mirrored.
+    packed = np.packbits(presence_matrix, axis=1).view(np.uint64)
+    intersection_sizes = np.empty((num_svs, num_svs), dtype=np.int32)
+    for i in range(num_svs):
+        row = _bitwise_count(packed[i:] & packed[i]).sum(axis=1, dtype=np.int32)
+        intersection_sizes[i, i:] = row
+        intersection_sizes[i:, i] = row
 
     # 3. Calculate union sizes using the inclusion-exclusion principle
     # |A U B| = |A| + |B| - |A intersect B|
-    set_lengths = np.sum(presence_matrix, axis=1, dtype=np.int32)
+    set_lengths = np.diagonal(intersection_sizes)
     # Use broadcasting to create the |A| + |B| matrix
     sum_of_lengths = set_lengths[:, np.newaxis] + set_lengths
     union_sizes = sum_of_lengths - intersection_sizes
@@ -95,25 +117,26 @@ def update_ps_unions_intersections(
     tuple[np.ndarray, np.ndarray]
         A tuple containing the updated union and intersection size matrices.
     """
-    sorted_indices = sorted(indices_to_remove, reverse=True)
-    for i in sorted_indices:
-        union_sizes = np.delete(union_sizes, i, axis=0)
-        union_sizes = np.delete(union_sizes, i, axis=1)
-        intersection_sizes = np.delete(intersection_sizes, i, axis=0)
-        intersection_sizes = np.delete(intersection_sizes, i, axis=1)
-
-    N = len(union_sizes)  # size before taking into account newly appended pivot sets
+    keep = np.ones(len(union_sizes), dtype=bool)
+    keep[list(indices_to_remove)] = False
+    kept = np.ix_(keep, keep)
+
+    N = int(keep.sum())  # size before taking into account newly appended pivot sets
     N1 = len(pivot_sets)  # new size
     new_union_sizes = np.zeros((N1, N1), dtype=int)
-    new_union_sizes[:N, :N] = union_sizes
+    new_union_sizes[:N, :N] = union_sizes[kept]
     new_intersection_sizes = np.zeros((N1, N1), dtype=int)
-    new_intersection_sizes[:N, :N] = intersection_sizes
+    new_intersection_sizes[:N, :N] = intersection_sizes[kept]
 
+    set_lengths = [len(p_set) for p_set in pivot_sets]
     for i in range(N, N1):
+        p_set_i = pivot_sets[i]
         for k in range(i):
-            new_union_sizes[i, k] = new_union_sizes[k, i] = len(pivot_sets[k].union(pivot_sets[i]))
-            new_intersection_sizes[i, k] = new_intersection_sizes[k, i] = len(pivot_sets[k].intersection(pivot_sets[i]))
-        new_union_sizes[i, i] = new_intersection_sizes[i, i] = len(pivot_sets[i])
+            num_common = len(pivot_sets[k] & p_set_i)
+            new_intersection_sizes[i, k] = new_intersection_sizes[k, i] = num_common
+            # |A U B| = |A| + |B| - |A intersect B|
+            new_union_sizes[i, k] = new_union_sizes[k, i] = set_lengths[k] + set_lengths[i] - num_common
+        new_union_sizes[i, i] = new_intersection_sizes[i, i] = set_lengths[i]
     return new_union_sizes, new_intersection_sizes
 
 
@@ -128,6 +151,8 @@ def find_next_cluster(
 
     This heuristic identifies the pair with the highest Jaccard similarity
     between their pivot sets, promoting earlier and more effective reduction.
+    The other members of the cluster are the rows most similar to the best row;
+    rows with equal similarity are taken in descending index order.
 
     Parameters
     ----------
@@ -151,24 +176,32 @@ def find_next_cluster(
     if len(pivot_sets) <= max_cluster_size:
         return list(range(len(pivot_sets)))
 
-    # Replace division by zero with 0
-    with np.errstate(divide="ignore", invalid="ignore"):
-        scores_table = np.nan_to_num(intersection_sizes / union_sizes)
+    # Jaccard similarities, with 0 where the union is empty
+    scores_table = np.divide(
+        intersection_sizes, union_sizes, out=np.zeros(union_sizes.shape, dtype=float), where=union_sizes > 0
+    )
 
     np.fill_diagonal(scores_table, 0)
 
-    row_scores = np.max(scores_table**2, axis=1)
+    # The scores are non-negative, so the row with the largest (squared) score is the argmax of the row maxima.
+    row_scores = np.max(scores_table, axis=1)
     best_row_index = np.argmax(row_scores)
     scores_in_best_row = scores_table[best_row_index, :]
 
-    # Get the indices that would sort the scores in descending order
-    sorted_indices = np.argsort(scores_in_best_row)[::-1]
-
-    # Remove best_row_index from sorted_indices
-    sorted_indices = sorted_indices[sorted_indices != best_row_index]
+    # Only the best `max_cluster_size - 1` candidates are needed, so they are selected with
+    # a partial sort. The best row itself is excluded by giving it a score below all others.
+    # Every candidate tied with the cut-off score is kept, and the candidates are ordered by
+    # descending score, then by descending index, so that ties are broken deterministically.
+    candidate_scores = scores_in_best_row.copy()
+    candidate_scores[best_row_index] = -1
+    num_candidates = max_cluster_size - 1
+    cutoff_score = -np.partition(-candidate_scores, num_candidates - 1)[num_candidates - 1]
+    candidates = np.flatnonzero(candidate_scores >= cutoff_score)
+    order = np.lexsort((-candidates, -candidate_scores[candidates]))
+    top_candidates = candidates[order][:num_candidates]
 
     top_indices = [int(best_row_index)]
-    for idx in sorted_indices[: max_cluster_size - 1]:  # Corrected loop limit
+    for idx in top_candidates:
         if scores_in_best_row[idx] == 0 and len(top_indices) > 1:
             break
         top_indices.append(int(idx))
@@ -176,6 +209,52 @@ def find_next_cluster(
     return top_indices
 
 
+def find_greedy_pair(
+    sv_sizes: List[int],
+    union_sizes: np.ndarray,
+    intersection_sizes: np.ndarray,
+    base: float = 0.6,
+) -> Tuple[int, int]:
+    """
+    Finds the pair of state vectors with the smallest estimated product size.
+
+    The size of the product of two state vectors is estimated as
+    `n1 * n2 * base^m`, where `n1` and `n2` are the sizes of the operands,
+    and `m` is the size of the intersection of their pivot sets (see
+    `find_predator_prey`). Ties are broken in favour of the pair with the
+    smaller union of pivot sets.
+
+    Parameters
+    ----------
+    sv_sizes : List[int]
+        A list of the sizes (number of TObjects) of the StateVectors.
+    union_sizes : np.ndarray
+        A square matrix of pivot set union sizes.
+    intersection_sizes : np.ndarray
+        A square matrix of pivot set intersection sizes.
+    base : float, optional
+        The base for the exponential reduction estimation. Defaults to 0.6.
+
+    Returns
+    -------
+    Tuple[int, int]
+        The indices `(i, j)`, with `i < j`, of the pair to multiply next.
+    """
+    num_svs = len(sv_sizes)
+    if num_svs < 2:
+        raise ValueError("At least two state vectors are required to find a pair.")
+
+    sizes = np.array(sv_sizes, dtype=float)
+    with np.errstate(over="ignore"):
+        estimated_sizes = np.outer(sizes, sizes) * base**intersection_sizes
+
+    # Only consider the upper triangle, i.e. each unordered pair once.
+    estimated_sizes[np.tril_indices(num_svs)] = np.inf
+    best_flat_index = np.lexsort((np.ravel(union_sizes), estimated_sizes.ravel()))[0]
+    i, j = divmod(int(best_flat_index), num_svs)
+    return i, j
+
+
 def find_predator_prey(
     sv_sizes: List[int],
     intersection_sizes: np.ndarray,
@@ -288,3 +367,55 @@ def find_predator_prey(
 
     # No predator found
     return None, None
+
+
+# Bound on the number of elements of the pairwise matrices built at once by `find_subsumed`.
+_SUBSUMPTION_BLOCK_ELEMENTS = 1 << 20
+
+
+def _masks_to_words(masks: List[int], num_words: int) -> np.ndarray:
+    """Pack a list of integer bitmasks into a (len(masks), num_words) array of uint64 words."""
+    data = b"".join(mask.to_bytes(8 * num_words, "little") for mask in masks)
+    return np.frombuffer(data, dtype="<u8").reshape(len(masks), num_words)
+
+
+def find_subsumed(ones_masks: List[int], zeros_masks: List[int]) -> np.ndarray:
+    """
+    Find the TObjects which are subsumed by (more specific than) another TObject.
+
+    TObject `i` subsumes TObject `j` if every constraint of `i` is also a constraint
+    of `j`, i.e. the bitmasks of `i` are subsets of those of `j`. The bitmasks are
+    packed into uint64 words and all pairs are tested with broadcast bitwise
+    operations, in blocks of rows to bound the memory.
+
+    Parameters
+    ----------
+    ones_masks : list[int]
+        The `ones` bitmasks of the TObjects. The pairs of bitmasks must be distinct.
+    zeros_masks : list[int]
+        The `zeros` bitmasks of the TObjects.
+
+    Returns
+    -------
+    np.ndarray
+        A boolean array which is True for every TObject subsumed by another one.
+    """
+    num_t_objects = len(ones_masks)
+    max_bits = max(max(ones_masks).bit_length(), max(zeros_masks).bit_length(), 1)
+    num_words = -(-max_bits // 64)
+    ones = _masks_to_words(ones_masks, num_words)
+    zeros = _masks_to_words(zeros_masks, num_words)
+
+    subsumed = np.zeros(num_t_objects, dtype=bool)
+    block_size = max(1, _SUBSUMPTION_BLOCK_ELEMENTS // num_t_objects)
+    for start in range(0, num_t_objects, block_size):
+        stop = min(start + block_size, num_t_objects)
+        # not_subsuming[i, j] is True if TObject `start + i` has a constraint which `j` lacks.
+        not_subsuming = np.zeros((stop - start, num_t_objects), dtype=bool)
+        for w in range(num_words):
+            not_subsuming |= (ones[start:stop, w, None] & ~ones[None, :, w]) != 0
+            not_subsuming |= (zeros[start:stop, w, None] & ~zeros[None, :, w]) != 0
+        # A TObject does not subsume itself.
+        not_subsuming[np.arange(stop - start), np.arange(start, stop)] = True
+        subsumed |= ~not_subsuming.all(axis=0)
+    return subsumed
@@ -6,8 +6,11 @@ process of taking a high-level rule string (e.g., "a && (b || c)") and
 converting it into a `StateVector`, the core data structure used by the engine.
 """
 
+import itertools
+from collections import OrderedDict
 from typing import Dict, Any, List, Tuple
 
+from . import helpers
 from .rule_parser import RuleParser
 from .state_vector import StateVector
 from .t_object import TObject
@@ -16,6 +19,125 @@ from .t_object import TObject
 # An AST node is a tuple, e.g., ("op", "&&", left_node, right_node).
 ASTNode = Tuple[Any, ...]
 
+# --- SIMPLE AST CACHE ---
+# The simple ASTs of a rule (after the replacement of repeated variables and
+# the flattening) and its auxiliary variables only depend on the rule string,
+# so they are shared between all converter instances. The indices of the
+# auxiliary variables are assigned per conversion, as they depend on the engine.
+_SIMPLE_AST_CACHE_MAX_SIZE = 8192
+_simple_ast_cache: "OrderedDict[str, Tuple[List[ASTNode], Dict[str, int], Tuple[str, ...]]]" = OrderedDict()
+
+# --- CONVERSION CACHE ---
+# The final StateVector of a rule only depends on the rule string, the indices
+# of the rule's variables and the offset of the auxiliary indices, so it is
+# shared between all converter instances. StateVectors are immutable, so cached
+# results are returned without copying.
+_CONVERSION_CACHE_MAX_SIZE = 8192
+_conversion_cache: "OrderedDict[Tuple[str, Tuple[int, ...], int], StateVector]" = OrderedDict()
+
+# --- STATE VECTOR TEMPLATES ---
+# The TObjects of a simple rule, written in terms of the positions of its
+# variables: a template is a tuple of `(ones_positions, zeros_positions)` pairs.
+# Binary rules `x1 op x2` use positions 0 and 1; triplet rules `x1 = (x2 op x3)`
+# use positions 0, 1 and 2.
+Template = Tuple[Tuple[Tuple[int, ...], Tuple[int, ...]], ...]
+
+BINARY_TEMPLATES: Dict[str, Template] = {
+    "&&": (((0, 1), ()),),
+    "||": (((0,), ()), ((1,), (0,))),
+    "^^": (((0,), (1,)), ((1,), (0,))),
+    "=>": (((0, 1), ()), ((), (0,))),
+    "<=": (((0,), ()), ((), (0, 1))),
+    "=": (((0, 1), ()), ((), (0, 1))),
+}
+
+TRIPLET_TEMPLATES: Dict[str, Template] = {
+    "&&": (((0, 1, 2), ()), ((), (0, 1)), ((1,), (0, 2))),
+    "||": (((0, 1), ()), ((0, 2), (1,)), ((), (0, 1, 2))),
+    "^^": (((0, 1), (2,)), ((0, 2), (1,)), ((), (0, 1, 2)), ((1, 2), (0,))),
+    "=>": (((0, 1, 2), ()), ((0,), (1,)), ((1,), (0, 2))),
+    "<=": (((0, 1), ()), ((0,), (1, 2)), ((2,), (0, 1))),
+    "=": (((0, 1, 2), ()), ((0,), (1, 2)), ((1,), (0, 2)), ((2,), (0, 1))),
+}
+
+
+def _negate_template(template: Template, negated: Tuple[bool, ...]) -> Template:
+    """
+    Return the template of a rule whose variables at the negated positions are negated.
+
+    A negated variable has its 1s and 0s swapped.
+    """
+    return tuple(
+        (
+            tuple(b for b in ones_positions if not negated[b]) + tuple(b for b in zeros_positions if negated[b]),
+            tuple(b for b in zeros_positions if not negated[b]) + tuple(b for b in ones_positions if negated[b]),
+        )
+        for ones_positions, zeros_positions in template
+    )
+
+
+# The templates with the negations of their variables already applied, keyed by
+# `(op, negated)`, where `negated` holds the negation flag of each position.
+NEGATED_BINARY_TEMPLATES: Dict[Tuple[str, Tuple[bool, ...]], Template] = {
+    (op, negated): _negate_template(template, negated)
+    for op, template in BINARY_TEMPLATES.items()
+    for negated in itertools.product((False, True), repeat=2)
+}
+
+NEGATED_TRIPLET_TEMPLATES: Dict[Tuple[str, Tuple[bool, ...]], Template] = {
+    (op, negated): _negate_template(template, negated)
+    for op, template in TRIPLET_TEMPLATES.items()
+    for negated in itertools.product((False, True), repeat=3)
+}
+
+
+def _materialize_template(template: Template, indices: Tuple[int, ...]) -> StateVector:
+    """
+    Build the `StateVector` of a template for the given variable indices.
+    """
+    return StateVector(
+        [
+            TObject(ones=[indices[b] for b in ones_positions], zeros=[indices[b] for b in zeros_positions])
+            for ones_positions, zeros_positions in template
+        ]
+    )
+
+
+def _multiply_state_vectors(state_vectors: List[StateVector]) -> StateVector:
+    """
+    Multiply the state vectors of the simple rules of a rule together.
+
+    Instead of growing a single product from left to right, the pair with the
+    smallest estimated product (see `helpers.find_greedy_pair`) is multiplied
+    first, which keeps the intermediate products small. The last three vectors
+    are multiplied in order, as the cost of choosing a pair outweighs the gain.
+    The multiplication stops early if a product is a contradiction.
+    """
+    if not state_vectors:
+        return StateVector([TObject()])
+
+    remaining_svs = list(state_vectors)
+    if len(remaining_svs) > 3:
+        pivot_sets = [sv.pivot_set() for sv in remaining_svs]
+        union_sizes, intersection_sizes = helpers.calc_ps_unions_intersections(pivot_sets)
+        while len(remaining_svs) > 3:
+            sv_sizes = [sv.size() for sv in remaining_svs]
+            i, j = helpers.find_greedy_pair(sv_sizes, union_sizes, intersection_sizes)
+            product_sv = remaining_svs[i] * remaining_svs[j]
+            if product_sv.is_contradiction():
+                return product_sv  # The remaining factors cannot restore any state.
+
+            remaining_svs = [sv for k, sv in enumerate(remaining_svs) if k != i and k != j] + [product_sv]
+            pivot_sets = [p_set for k, p_set in enumerate(pivot_sets) if k != i and k != j] + [product_sv.pivot_set()]
+            union_sizes, intersection_sizes = helpers.update_ps_unions_intersections(
+                union_sizes, intersection_sizes, [i, j], pivot_sets
+            )
+
+    final_sv = remaining_svs[0]
+    for sv in remaining_svs[1:]:
+        final_sv *= sv
+    return final_sv
+
 
 class RuleConverter:
     """
@@ -40,6 +162,9 @@ class RuleConverter:
     def __init__(self, variable_map: Dict[str, int]):
         self._variable_map = variable_map
         self._parser = RuleParser(self._variable_map)
+        # Auxiliary variables are placed right after the largest engine index,
+        # so that all indices seen by `TObject` stay positive.
+        self._aux_index_offset: int = max(variable_map.values(), default=0)
 
         # Internal state reset for each conversion.
         self._aux_var_counter: int = 0
@@ -54,6 +179,10 @@ class RuleConverter:
         entire pipeline from parsing to final simplification, including the
         management of temporary variables required for complex rules.
 
+        Results are cached by rule string and by the indices of the rule's
+        variables, so converting the same rule again with the same indices
+        returns the cached `StateVector` (see `clear_cache`).
+
         Parameters
         ----------
         rule_string : str
@@ -68,35 +197,107 @@ class RuleConverter:
         self._aux_var_counter = 0
         self._aux_var_map = {}
 
-        # 1. Parse the original rule string into an AST.
+        # 1. Parse the original rule string into an AST. This also validates its variables.
         ast = self._parser.parse(rule_string)
 
-        # 2. Handle repeated variables by introducing dummies and equality constraints.
-        modified_ast, equality_asts = self._handle_repeated_variables_in_ast(ast)
+        cached = _simple_ast_cache.get(rule_string)
+        if cached is not None:
+            _simple_ast_cache.move_to_end(rule_string)
+            self._all_simple_asts = list(cached[0])
+            self._aux_var_map = dict(cached[1])
+            self._aux_var_counter = len(self._aux_var_map)
+            rule_variables = cached[2]
+        else:
+            # 2. Handle repeated variables by introducing dummies and equality constraints.
+            modified_ast, equality_asts = self._handle_repeated_variables_in_ast(ast)
+
+            # 3. Flatten the main AST and combine with equality rules.
+            flattened_asts = self._flatten(modified_ast)
+            self._all_simple_asts = flattened_asts + equality_asts
+            rule_variables = self._collect_rule_variables(self._all_simple_asts)
+
+            _simple_ast_cache[rule_string] = (list(self._all_simple_asts), dict(self._aux_var_map), rule_variables)
+            if len(_simple_ast_cache) > _SIMPLE_AST_CACHE_MAX_SIZE:
+                _simple_ast_cache.popitem(last=False)
+
+        rule_indices = tuple(self._variable_map[name] for name in rule_variables)
+        cache_key = (rule_string, rule_indices, self._aux_index_offset)
+        final_sv = _conversion_cache.get(cache_key)
+        if final_sv is not None:
+            _conversion_cache.move_to_end(cache_key)
+            return final_sv
+
+        # The map of the rule's own variables, original and auxiliary, so the
+        # engine's variable map is not copied for every conversion.
+        aux_indices = [self._aux_index_offset - aux_id for aux_id in self._aux_var_map.values()]
+        rule_variable_map = dict(zip(rule_variables, rule_indices))
+        rule_variable_map.update(zip(self._aux_var_map.keys(), aux_indices))
+
+        final_sv = self._multiply_simple_asts(rule_variable_map, aux_indices)
+        _conversion_cache[cache_key] = final_sv
+        if len(_conversion_cache) > _CONVERSION_CACHE_MAX_SIZE:
+            _conversion_cache.popitem(last=False)
+        return final_sv
 
-        # 3. Flatten the main AST and combine with equality rules.
-        flattened_asts = self._flatten(modified_ast)
-        self._all_simple_asts = flattened_asts + equality_asts
+    @staticmethod
+    def clear_cache():
+        """
+        Clear the caches of simple ASTs and of converted rules shared by all converters.
+        """
+        _simple_ast_cache.clear()
+        _conversion_cache.clear()
 
-        # The full map includes original variables plus any auxiliary ones.
-        full_variable_map = self._variable_map.copy()
-        full_variable_map.update(self._aux_var_map)
+    def _multiply_simple_asts(self, rule_variable_map: Dict[str, int], aux_indices: List[int]) -> StateVector:
+        """
+        Convert the simple ASTs of the current rule and multiply them together.
 
+        Parameters
+        ----------
+        rule_variable_map : Dict[str, int]
+            The mapping of all variables (original and auxiliary) of the rule to indices.
+        aux_indices : List[int]
+            The indices of the auxiliary variables, which are removed from the result.
+
+        Returns
+        -------
+        StateVector
+            The final, combined `StateVector` representing the logic of the rule.
+        """
         # 4. Convert each simple AST rule into a StateVector.
-        state_vectors = [self._visit(simple_ast, full_variable_map) for simple_ast in self._all_simple_asts]
+        state_vectors = [self._visit(simple_ast, rule_variable_map) for simple_ast in self._all_simple_asts]
 
         # 5. Multiply all the simple state vectors together.
-        final_sv = StateVector([TObject()]) if not state_vectors else state_vectors[0]
-        for sv in state_vectors[1:]:
-            final_sv *= sv
+        final_sv = _multiply_state_vectors(state_vectors)
+        if final_sv.is_contradiction():
+            return final_sv
 
         # 6. Remove all temporary auxiliary variables and simplify the result.
-        if self._aux_var_map:
-            aux_indices = list(self._aux_var_map.values())
-            final_sv = final_sv.remove_variables(aux_indices).simplify(max_num_iter=None, reduce_subsumption=True)
+        if aux_indices:
+            final_sv = final_sv.remove_variables(aux_indices)
+            if final_sv.size() > 1:
+                # A single TObject cannot be reduced any further.
+                final_sv = final_sv.simplify(reduce_subsumption=True)
 
         return final_sv
 
+    def _collect_rule_variables(self, simple_asts: List[ASTNode]) -> Tuple[str, ...]:
+        """
+        Return the names of the original (non-auxiliary) variables of simple ASTs.
+
+        The names are listed once each, in the order of their first occurrence.
+        """
+        names: Dict[str, None] = {}
+        stack = list(reversed(simple_asts))
+        while stack:
+            node = stack.pop()
+            if node[0] == "var":
+                if node[2] not in self._aux_var_map:
+                    names[node[2]] = None
+            else:
+                stack.append(node[3])
+                stack.append(node[2])
+        return tuple(names)
+
     def _handle_repeated_variables_in_ast(self, ast: ASTNode) -> Tuple[ASTNode, List[ASTNode]]:
         """
         Traverse an AST, replacing duplicate variable occurrences with dummies.
@@ -119,19 +320,21 @@ class RuleConverter:
         """
         seen_vars: Dict[str, int] = {}
         equality_asts: List[ASTNode] = []
-        modified_ast = self._replace_duplicates_recursive(ast, seen_vars, equality_asts)
+        modified_ast = self._replace_duplicates(ast, seen_vars, equality_asts)
         return modified_ast, equality_asts
 
-    def _replace_duplicates_recursive(
-        self, node: ASTNode, seen_vars: Dict[str, int], equality_asts: List[ASTNode]
-    ) -> ASTNode:
+    def _replace_duplicates(self, node: ASTNode, seen_vars: Dict[str, int], equality_asts: List[ASTNode]) -> ASTNode:
         """
-        Recursively rebuild the AST, replacing duplicate variables.
+        Rebuild the AST, replacing duplicate variables.
+
+        The AST is traversed in post-order with an explicit stack, so deep ASTs
+        do not hit the recursion limit. Left children are visited before right
+        children, so variables are seen in the order they appear in the rule.
 
         Parameters
         ----------
         node : ASTNode
-            The current AST node to process.
+            The root of the AST to process.
         seen_vars : Dict[str, int]
             A dictionary tracking variables seen so far in the traversal.
         equality_asts : List[ASTNode]
@@ -140,15 +343,20 @@ class RuleConverter:
         Returns
         -------
         ASTNode
-            The modified AST node.
+            The modified AST.
         """
-        node_type = node[0]
-        if node_type == "var":
-            is_negated, var_name = node[1], node[2]
-            if var_name not in seen_vars:
-                seen_vars[var_name] = 1
-                return node
-            else:
+        results: List[ASTNode] = []
+        stack: List[Tuple[ASTNode, bool]] = [(node, False)]
+        while stack:
+            current, children_done = stack.pop()
+            node_type = current[0]
+            if node_type == "var":
+                is_negated, var_name = current[1], current[2]
+                if var_name not in seen_vars:
+                    seen_vars[var_name] = 1
+                    results.append(current)
+                    continue
+
                 # This is a repeated variable; create a dummy.
                 self._aux_var_counter += 1
                 dummy_name = f"__aux_{self._aux_var_counter}"
@@ -163,17 +371,21 @@ class RuleConverter:
                 )
                 equality_asts.append(equality_ast)
 
-                # Return a new 'var' node for the dummy, preserving negation.
-                return "var", is_negated, dummy_name
-
-        if node_type == "op":
-            # Recurse on children and rebuild the operator node.
-            op, left, right = node[1], node[2], node[3]
-            new_left = self._replace_duplicates_recursive(left, seen_vars, equality_asts)
-            new_right = self._replace_duplicates_recursive(right, seen_vars, equality_asts)
-            return "op", op, new_left, new_right
-
-        raise TypeError(f"Unexpected AST node structure: {node}")
+                # Use a new 'var' node for the dummy, preserving negation.
+                results.append(("var", is_negated, dummy_name))
+            elif node_type != "op":
+                raise TypeError(f"Unexpected AST node structure: {current}")
+            elif not children_done:
+                # Revisit the operator after its children; the left child is popped first.
+                stack.append((current, True))
+                stack.append((current[3], False))
+                stack.append((current[2], False))
+            else:
+                # Rebuild the operator node from its processed children.
+                new_right = results.pop()
+                new_left = results.pop()
+                results.append(("op", current[1], new_left, new_right))
+        return results[0]
 
     def _flatten(self, ast: ASTNode) -> List[ASTNode]:
         """
@@ -183,8 +395,11 @@ class RuleConverter:
         that can be directly converted to a `StateVector`. Complex rules like
         `a = (b && (c || d))` are broken down using auxiliary variables:
         - `__aux1 = c || d`
-        - `__aux2 = b && __aux1`
-        - `a = __aux2`
+        - `a = (b && __aux1)`
+
+        A root equivalence with a single variable on one side is a definition of
+        that variable, so the variable itself takes the place of the auxiliary
+        variable that would otherwise represent the other side.
 
         Parameters
         ----------
@@ -217,51 +432,83 @@ class RuleConverter:
                         return [ast]
 
         simple_asts: List[ASTNode] = []
-        final_rule = self._flatten_recursive(ast, simple_asts, is_root=True)
+        final_rule = self._flatten_node(ast, simple_asts, is_root=True)
         simple_asts.append(final_rule)
         return simple_asts
 
-    def _flatten_recursive(self, node: ASTNode, simple_asts: List[ASTNode], is_root: bool) -> ASTNode:
+    def _flatten_node(self, node: ASTNode, simple_asts: List[ASTNode], is_root: bool) -> ASTNode:
         """
-        Recursive helper for the flattening process.
+        Helper for the flattening process.
+
+        The sub-tree is traversed in post-order with an explicit stack, so deep
+        ASTs do not hit the recursion limit. Left children are processed before
+        right children, so auxiliary variables and simple rules are created in
+        the same order as by a depth-first recursion.
 
         Parameters
         ----------
         node : ASTNode
-            The current AST node to process.
+            The root of the sub-tree to process.
         simple_asts : List[ASTNode]
             A list to append newly created simple equivalence rules to.
         is_root : bool
-            True if the current node is the root of the original AST.
+            True if `node` is the root of the original AST.
 
         Returns
         -------
         ASTNode
             A `var` node (either original or auxiliary) representing the result
-            of the processed sub-tree.
+            of the processed sub-tree, or the final rule if `node` is the root.
         """
         if node[0] == "var":
             return node
 
         op, left, right = node[1], node[2], node[3]
-        left_repr = self._flatten_recursive(left, simple_asts, is_root=False)
-        right_repr = self._flatten_recursive(right, simple_asts, is_root=False)
-        current_rule: ASTNode = ("op", op, left_repr, right_repr)
-
-        if is_root:
-            return current_rule
-
-        # This is an intermediate node, so create an auxiliary variable.
-        self._aux_var_counter += 1
-        aux_var_name = f"__aux_{self._aux_var_counter}"
-        self._aux_var_map[aux_var_name] = -self._aux_var_counter
-        aux_var_node: ASTNode = ("var", False, aux_var_name)
-
-        # Create the equivalence rule: aux_var = (left_repr op right_repr)
-        equivalence_rule: ASTNode = ("op", "=", aux_var_node, current_rule)
-        simple_asts.append(equivalence_rule)
 
-        return aux_var_node
+        if is_root and op == "=" and (left[0] == "var") != (right[0] == "var"):
+            # A definition `x = (expr)`: substitute `x` for the root of `expr` and emit
+            # the triplet `x = (l op r)` directly instead of introducing `__aux = expr`.
+            single, expr = (left, right) if left[0] == "var" else (right, left)
+            expr_op, expr_left, expr_right = expr[1], expr[2], expr[3]
+            left_repr = self._flatten_node(expr_left, simple_asts, is_root=False)
+            right_repr = self._flatten_node(expr_right, simple_asts, is_root=False)
+            return "op", "=", single, ("op", expr_op, left_repr, right_repr)
+
+        results: List[ASTNode] = []
+        stack: List[Tuple[ASTNode, bool]] = [(node, False)]
+        while stack:
+            current, children_done = stack.pop()
+            if current[0] == "var":
+                results.append(current)
+                continue
+            if not children_done:
+                # Revisit the operator after its children; the left child is popped first.
+                stack.append((current, True))
+                stack.append((current[3], False))
+                stack.append((current[2], False))
+                continue
+
+            right_repr = results.pop()
+            left_repr = results.pop()
+            current_rule: ASTNode = ("op", current[1], left_repr, right_repr)
+
+            if is_root and current is node:
+                results.append(current_rule)
+                continue
+
+            # This is an intermediate node, so create an auxiliary variable.
+            self._aux_var_counter += 1
+            aux_var_name = f"__aux_{self._aux_var_counter}"
+            self._aux_var_map[aux_var_name] = -self._aux_var_counter
+            aux_var_node: ASTNode = ("var", False, aux_var_name)
+
+            # Create the equivalence rule: aux_var = (left_repr op right_repr)
+            equivalence_rule: ASTNode = ("op", "=", aux_var_node, current_rule)
+            simple_asts.append(equivalence_rule)
+
+            results.append(aux_var_node)
+
+        return results[0]
 
     def _visit(self, node: ASTNode, var_map: Dict[str, int]) -> StateVector:
         """
@@ -312,12 +559,14 @@ class RuleConverter:
         return StateVector([t_obj])
 
     @staticmethod
-    def _create_triplet_sv(op: str, idx1: int, idx2: int, idx3: int) -> StateVector:
+    def _create_triplet_sv(
+        op: str, idx1: int, idx2: int, idx3: int, negated: Tuple[bool, bool, bool] = (False, False, False)
+    ) -> StateVector:
         """
         Create a `StateVector` for a triplet rule: `x1 = (x2 op x3)`.
 
-        This is a factory method that returns a pre-computed `StateVector` for
-        a given logical operation between three variables.
+        This is a factory method that builds the `StateVector` of a given
+        logical operation between three variables from `NEGATED_TRIPLET_TEMPLATES`.
 
         Parameters
         ----------
@@ -325,50 +574,18 @@ class RuleConverter:
             The logical operator (e.g., '&&', '||').
         idx1, idx2, idx3 : int
             The integer indices for the variables `x1`, `x2`, and `x3`.
+        negated : Tuple[bool, bool, bool], optional
+            Whether each of `x1`, `x2` and `x3` appears negated in the rule.
 
         Returns
         -------
         StateVector
             The corresponding `StateVector` for the triplet operation.
         """
-        op_map = {
-            "&&": [
-                TObject(ones={idx1, idx2, idx3}),
-                TObject(zeros={idx1, idx2}),
-                TObject(ones={idx2}, zeros={idx1, idx3}),
-            ],
-            "||": [
-                TObject(ones={idx1, idx2}),
-                TObject(ones={idx1, idx3}, zeros={idx2}),
-                TObject(zeros={idx1, idx2, idx3}),
-            ],
-            "^^": [
-                TObject(ones={idx1, idx2}, zeros={idx3}),
-                TObject(ones={idx1, idx3}, zeros={idx2}),
-                TObject(zeros={idx1, idx2, idx3}),
-                TObject(ones={idx2, idx3}, zeros={idx1}),
-            ],
-            "=>": [
-                TObject(ones={idx1, idx2, idx3}),
-                TObject(ones={idx1}, zeros={idx2}),
-                TObject(ones={idx2}, zeros={idx1, idx3}),
-            ],
-            "<=": [
-                TObject(ones={idx1, idx2}),
-                TObject(ones={idx1}, zeros={idx2, idx3}),
-                TObject(ones={idx3}, zeros={idx1, idx2}),
-            ],
-            "=": [
-                TObject(ones={idx1, idx2, idx3}),
-                TObject(ones={idx1}, zeros={idx2, idx3}),
-                TObject(ones={idx2}, zeros={idx1, idx3}),
-                TObject(ones={idx3}, zeros={idx1, idx2}),
-            ],
-        }
-        t_objs = op_map.get(op)
-        if t_objs is None:
+        template = NEGATED_TRIPLET_TEMPLATES.get((op, negated))
+        if template is None:
             raise NotImplementedError(f"Triplet operator for '{op}' not implemented.")
-        return StateVector(t_objects=t_objs)
+        return _materialize_template(template, (idx1, idx2, idx3))
 
     def _visit_op(self, node: ASTNode, var_map: Dict[str, int]) -> StateVector:
         """
@@ -400,23 +617,10 @@ class RuleConverter:
 
         # Case: Simple binary rule like `x1 op x2`
         if left_is_var and right_is_var:
-            l_neg, l_name = left[1], left[2]
-            r_neg, r_name = right[1], right[2]
-            idx1, idx2 = var_map[l_name], var_map[r_name]
-            vars_to_negate = [idx for idx, is_neg in [(idx1, l_neg), (idx2, r_neg)] if is_neg]
-
-            op_map = {
-                "&&": StateVector([TObject(ones={idx1, idx2})]),
-                "||": StateVector([TObject(ones={idx1}), TObject(ones={idx2}, zeros={idx1})]),
-                "^^": StateVector([TObject(ones={idx1}, zeros={idx2}), TObject(ones={idx2}, zeros={idx1})]),
-                "=>": StateVector([TObject(ones={idx1, idx2}), TObject(zeros={idx1})]),
-                "<=": StateVector([TObject(ones={idx1}), TObject(zeros={idx1, idx2})]),
-                "=": StateVector([TObject(ones={idx1, idx2}), TObject(zeros={idx1, idx2})]),
-            }
-            sv = op_map.get(op)
-            if sv is None:
+            template = NEGATED_BINARY_TEMPLATES.get((op, (left[1], right[1])))
+            if template is None:
                 raise NotImplementedError(f"Binary operator '{op}' not implemented.")
-            return sv.negate_variables(vars_to_negate)
+            return _materialize_template(template, (var_map[left[2]], var_map[right[2]]))
 
         # Case: Simple triplet rule like `x1 = (x2 op x3)`
         if op == "=":
@@ -424,16 +628,7 @@ class RuleConverter:
             if single[0] == "var" and triplet[0] == "op":
                 _, inner_op, i_left, i_right = triplet
                 if i_left[0] == "var" and i_right[0] == "var":
-                    s_neg, s_name = single[1], single[2]
-                    l_neg, l_name = i_left[1], i_left[2]
-                    r_neg, r_name = i_right[1], i_right[2]
-                    idx1, idx2, idx3 = var_map[s_name], var_map[l_name], var_map[r_name]
-
-                    # Collect all negations from the AST.
-                    vars_to_negate = [idx for idx, is_neg in [(idx1, s_neg), (idx2, l_neg), (idx3, r_neg)] if is_neg]
-                    # Create the base StateVector for the triplet.
-                    sv = self._create_triplet_sv(inner_op, idx1, idx2, idx3)
-                    # Apply negations to get the final correct vector.
-                    return sv.negate_variables(vars_to_negate)
+                    idx1, idx2, idx3 = var_map[single[2]], var_map[i_left[2]], var_map[i_right[2]]
+                    return self._create_triplet_sv(inner_op, idx1, idx2, idx3, (single[1], i_left[1], i_right[1]))
 
         raise NotImplementedError(f"Unsupported AST structure for direct conversion: {node}")
@@ -1,181 +1,166 @@
 """
 High-performance rule string parsing module.
 
-This module provides the `RuleParser` class, which leverages the `pyparsing`
-library to efficiently parse logical rule strings into a standardized Abstract
-Syntax Tree (AST). It defines the grammar for the rule language and handles
-the transformation of the parsed output into a consistent, tuple-based AST
-format used by the rest of the engine.
+This module provides the `RuleParser` class, which parses logical rule strings
+into a standardized, tuple-based Abstract Syntax Tree (AST) used by the rest of
+the engine. Rule strings are split into tokens by a single regular expression,
+and the tokens are parsed by a small Pratt (precedence climbing) parser that
+emits the AST directly.
 """
 
-from typing import Dict, Any
+import re
+from collections import OrderedDict
+from typing import Dict, Any, List, Tuple
+
+# --- AST CACHE ---
+# Parsed ASTs are immutable tuples that only depend on the rule string, so they
+# are shared between all parser instances (e.g. many engines built from the same
+# rules). Variable names are re-validated against each parser's variable map.
+_AST_CACHE_MAX_SIZE = 8192
+_ast_cache: "OrderedDict[str, Any]" = OrderedDict()
+
+# --- GRAMMAR ---
+# A token is a variable (a standard Python identifier), an operator or a
+# parenthesis. Longer operators are listed before their prefixes. Any other
+# non-whitespace character is captured as an error.
+_TOKEN_PATTERN = re.compile(
+    r"\s*(?:(?P<var>[A-Za-z_][A-Za-z0-9_]*)|(?P<op><=>|<=|=>|!=|&&|\|\||\^\^|=|!|\(|\))|(?P<error>\S))"
+)
+
+# Binding powers of the binary operators, from highest to lowest precedence.
+# All binary operators are left-associative. Negation `!` binds tighter than any of them.
+BINDING_POWERS: Dict[str, int] = {
+    "&&": 60,
+    "||": 50,
+    "^^": 40,
+    "!=": 40,
+    "=>": 30,
+    "<=": 30,
+    "=": 30,
+    "<=>": 30,
+}
+
+# Aliases are standardised in the AST.
+_OPERATOR_ALIASES: Dict[str, str] = {"<=>": "=", "!=": "^^"}
+
+
+def _tokenize(rule_string: str) -> List[Tuple[str, str, int]]:
+    """
+    Split a rule string into `(kind, text, position)` tokens.
 
-import pyparsing as pp
-from pyparsing import infixNotation, opAssoc
+    `kind` is either "var" or "op" (operators and parentheses).
 
-# --- PERFORMANCE OPTIMISATION ---
-# Enable Packrat Caching globally for pyparsing. This significantly speeds up
-# parsing of complex grammars by memoizing parsing results.
-pp.ParserElement.enablePackrat()
+    Raises
+    ------
+    ValueError
+        If the rule string contains a character which is not part of the grammar.
+    """
+    tokens = []
+    for match in _TOKEN_PATTERN.finditer(rule_string):
+        kind = match.lastgroup
+        if kind == "error":
+            raise ValueError(f"Unexpected character '{match.group(kind)}' at position {match.start(kind)}.")
+        tokens.append((kind, match.group(kind), match.start(kind)))
+    return tokens
 
 
-class AstTransformer:
+class _PrattParser:
     """
-    Transforms the pyparsing result into a standardized Abstract Syntax Tree (AST).
-
-    The `pyparsing` library, by default, produces a nested list structure. This
-    class provides a set of parse actions to convert this structure into a
-    more explicit and consistent tuple-based format that the rules engine can
-    easily process.
+    Parses a list of tokens into an AST by precedence climbing.
 
     Parameters
     ----------
-    variable_map : Dict[str, int]
-        A mapping from variable names to their internal 1-based integer indices.
-        This is used to validate that variables in the rule string are defined.
+    tokens : List[Tuple[str, str, int]]
+        The tokens of a rule string, as returned by `_tokenize`.
     """
 
-    def __init__(self, variable_map: Dict[str, int]):
-        self._variable_map = variable_map
-
-    def transform_variable(self, tokens: pp.ParseResults) -> Any:
+    def __init__(self, tokens: List[Tuple[str, str, int]]):
+        self._tokens = tokens
+        self._pos = 0
+
+    def parse(self) -> Any:
+        """Parse all tokens into a single expression."""
+        ast = self._parse_expression(0)
+        if self._pos < len(self._tokens):
+            _, text, position = self._tokens[self._pos]
+            raise ValueError(f"Unexpected '{text}' at position {position}.")
+        return ast
+
+    def _next(self) -> Tuple[str, str, int]:
+        """Consume and return the next token."""
+        if self._pos >= len(self._tokens):
+            raise ValueError("Unexpected end of rule.")
+        token = self._tokens[self._pos]
+        self._pos += 1
+        return token
+
+    def _parse_expression(self, min_binding_power: int) -> Any:
         """
-        Transform a variable token into a ('var', is_negated, name) tuple.
-
-        Parameters
-        ----------
-        tokens : pp.ParseResults
-            The parse results from pyparsing, containing the variable name.
-
-        Returns
-        -------
-        Any
-            A tuple representing the variable in the AST.
+        Parse an expression whose binary operators bind tighter than `min_binding_power`.
 
-        Raises
-        ------
-        ValueError
-            If the variable name is not found in the engine's `variable_map`.
+        An operator of equal binding power ends the expression, which makes all
+        binary operators left-associative.
         """
-        var_name = tokens[0]
-        if var_name not in self._variable_map:
-            raise ValueError(f"Variable '{var_name}' is not defined in the engine.")
-        return "var", False, var_name
+        node = self._parse_operand()
+        while self._pos < len(self._tokens):
+            kind, op, _ = self._tokens[self._pos]
+            binding_power = BINDING_POWERS.get(op) if kind == "op" else None
+            if binding_power is None or binding_power <= min_binding_power:
+                break
+            self._pos += 1
+            right = self._parse_expression(binding_power)
+            node = ("op", _OPERATOR_ALIASES.get(op, op), node, right)
+        return node
 
-    @staticmethod
-    def transform_unary_op(tokens: pp.ParseResults) -> Any:
+    def _parse_operand(self) -> Any:
         """
-        Transform a unary operation (negation) token.
-
-        This handles the '!' operator. It directly negates a variable by flipping
-        the `is_negated` flag in the variable's AST tuple. Negating a complex
-        expression in parentheses is disallowed.
-
-        Parameters
-        ----------
-        tokens : pp.ParseResults
-            The parse results from pyparsing.
-
-        Returns
-        -------
-        Any
-            The transformed AST node for the negated variable.
+        Parse a variable, a negated operand or a parenthesized expression.
 
         Raises
         ------
         ValueError
-            If negation is applied to a parenthesized expression.
-        """
-        op, operand = tokens[0]
-        if isinstance(operand, tuple) and operand[0] == "var":
-            # Flip the negation flag of the variable
-            return "var", not operand[1], operand[2]
-        # It's a negated expression, which is not allowed.
-        raise ValueError("Negation of expressions in parentheses is not allowed.")
-
-    @staticmethod
-    def transform_binary_op(tokens: pp.ParseResults) -> Any:
-        """
-        Transform a binary operation token into a nested AST structure.
-
-        This handles operators like '&&', '||', '=>', etc. It constructs a
-        left-associative tree of ('op', operator, left, right) tuples.
-
-        Parameters
-        ----------
-        tokens : pp.ParseResults
-            The parse results from pyparsing.
-
-        Returns
-        -------
-        Any
-            A nested tuple representing the binary operation in the AST.
+            If negation is applied to a parenthesized expression, or if the
+            token cannot start an operand.
         """
-        tokens = tokens[0]
-        node = tokens[0]
-        for i in range(1, len(tokens), 2):
-            op, right = tokens[i], tokens[i + 1]
-            if op == "<=>":
-                op = "="  # Standardize equivalence operator
-            if op == "!=":
-                op = "^^"  # Standardize XOR operator
-            node = ("op", op, node, right)
-        return node
+        kind, text, position = self._next()
+        if kind == "var":
+            return "var", False, text
+        if text == "!":
+            operand = self._parse_operand()
+            if operand[0] == "var":
+                # Flip the negation flag of the variable
+                return "var", not operand[1], operand[2]
+            # It's a negated expression, which is not allowed.
+            raise ValueError("Negation of expressions in parentheses is not allowed.")
+        if text == "(":
+            node = self._parse_expression(0)
+            _, closing, closing_position = self._next()
+            if closing != ")":
+                raise ValueError(f"Expected ')' at position {closing_position}, found '{closing}'.")
+            return node
+        raise ValueError(f"Unexpected '{text}' at position {position}.")
 
 
 class RuleParser:
     """
-    Parses rule strings into an Abstract Syntax Tree (AST) using pyparsing.
+    Parses rule strings into an Abstract Syntax Tree (AST).
 
-    This class defines the grammar for logical expressions and uses the
-    `AstTransformer` to convert parsed rule strings into a standardized AST
-    format. The grammar supports standard logical operators with defined
-    precedence.
+    The grammar supports standard logical operators with defined precedence
+    (see `BINDING_POWERS`). Parsed ASTs are cached by rule string and shared
+    by all parser instances.
 
     Parameters
     ----------
     variable_map : Dict[str, int]
         A dictionary mapping variable names to their 1-based integer indices.
-        This is passed to the `AstTransformer` for variable validation.
+        It is used to validate the variables of each parsed rule.
     """
 
     def __init__(self, variable_map: Dict[str, int]):
         """
-        Initialize the RuleParser and build the grammar.
+        Initialize the RuleParser.
         """
         self._variable_map = variable_map
-        self._transformer = AstTransformer(variable_map)
-        self._grammar = self._build_grammar()
-
-    def _build_grammar(self) -> pp.ParserElement:
-        """
-        Construct the logical expression grammar using pyparsing objects.
-
-        The grammar is defined using `infixNotation` to handle operator
-        precedence correctly. The order of operators in the list defines
-        their precedence from highest to lowest.
-
-        Returns
-        -------
-        pp.ParserElement
-            The complete, compiled parser element for the rule grammar.
-        """
-        # A variable is a standard Python identifier
-        variable = pp.Word(pp.alphas + "_", pp.alphanums + "_")
-        variable.setParseAction(self._transformer.transform_variable)
-
-        # --- Define grammar using infixNotation for precedence (highest to lowest) ---
-        expr = infixNotation(
-            variable,
-            [
-                ("!", 1, opAssoc.RIGHT, self._transformer.transform_unary_op),
-                ("&&", 2, opAssoc.LEFT, self._transformer.transform_binary_op),
-                ("||", 2, opAssoc.LEFT, self._transformer.transform_binary_op),
-                (pp.oneOf("^^ !="), 2, opAssoc.LEFT, self._transformer.transform_binary_op),
-                (pp.oneOf("=> <= = <=>"), 2, opAssoc.LEFT, self._transformer.transform_binary_op),
-            ],
-        )
-        return expr
 
     def parse(self, rule_string: str) -> Any:
         """
@@ -203,10 +188,41 @@ class RuleParser:
         if not rule_string:
             raise ValueError("Cannot parse an empty rule string.")
 
-        try:
-            # The [0] is to extract the single top-level match from the results
-            ast = self._grammar.parseString(rule_string, parseAll=True)[0]
-            return ast
-        except (pp.ParseException, ValueError) as e:
-            # Catch both pyparsing errors and our custom ValueErrors from transformers
-            raise ValueError(f"Invalid rule syntax: {e}") from e
+        ast = _ast_cache.get(rule_string)
+        if ast is not None:
+            _ast_cache.move_to_end(rule_string)
+        else:
+            try:
+                ast = _PrattParser(_tokenize(rule_string)).parse()
+            except ValueError as e:
+                raise ValueError(f"Invalid rule syntax: {e}") from e
+
+            _ast_cache[rule_string] = ast
+            if len(_ast_cache) > _AST_CACHE_MAX_SIZE:
+                _ast_cache.popitem(last=False)
+
+        self._validate_variables(ast)
+        return ast
+
+    def _validate_variables(self, ast: Any):
+        """
+        Check that all variables of an AST are defined in the variable map.
+
+        Parameters
+        ----------
+        ast : Any
+            The Abstract Syntax Tree to validate.
+
+        Raises
+        ------
+        ValueError
+            If the AST uses a variable which is not in the variable map.
+        """
+        stack = [ast]
+        while stack:
+            node = stack.pop()
+            if node[0] == "var":
+                if node[2] not in self._variable_map:
+                    raise ValueError(f"Invalid rule syntax: Variable '{node[2]}' is not defined in the engine.")
+            else:
+                stack.extend(node[2:])
@@ -7,10 +7,92 @@ rules and knowledge bases. The class provides methods for logical operations,
 simplification, and analysis.
 """
 
-from collections import defaultdict
+from collections import Counter, defaultdict, OrderedDict
 from typing import List, Optional, Set, Tuple, Iterable, Dict
 
-from .t_object import TObject
+from . import helpers
+from .t_object import TObject, _mask_to_indices, _popcount, _variables_to_mask
+
+# --- Product cache ---
+# Products of StateVectors are memoised under a canonical, order-independent
+# key of both operands. Only small products are kept, so the cache stays cheap
+# in memory while still short-circuiting repeated sub-products (e.g. repeated
+# predictions against the same knowledge base).
+_PRODUCT_CACHE_MAX_ENTRIES = 256
+_PRODUCT_CACHE_MAX_T_OBJECTS = 4096
+_product_cache: "OrderedDict[Tuple[frozenset, frozenset], StateVector]" = OrderedDict()
+
+
+def clear_product_cache():
+    """Remove all memoised StateVector products."""
+    _product_cache.clear()
+
+
+def _multiply_t_objects(t_objects1: Iterable[TObject], t_objects2: Iterable[TObject]) -> List[TObject]:
+    """
+    Return all non-null pairwise products of two collections of TObjects.
+
+    This is the inner kernel of `StateVector.__mul__`. It works directly on the
+    packed bitmasks. Only the variables constrained in both operands can cause
+    a contradiction, so the second operand is tiled into blocks of TObjects that
+    agree on this common support. Each TObject of the first operand is checked
+    once per block, and the products are then emitted in the original order
+    with a single lookup per pair. Null TObjects in the inputs are ignored.
+    """
+    t_objects1 = [t for t in t_objects1 if not t._is_null]
+    t_objects2 = [t for t in t_objects2 if not t._is_null]
+    if not t_objects1 or not t_objects2:
+        return []
+    if len(t_objects1) == 1 or len(t_objects2) == 1:
+        # With a single TObject on one side, the blocks cannot save any test.
+        if len(t_objects2) == 1:
+            single, others = t_objects2[0], t_objects1
+        else:
+            single, others = t_objects1[0], t_objects2
+        single_ones_mask, single_zeros_mask = single._ones_mask, single._zeros_mask
+        products = []
+        for t in others:
+            ones_mask, zeros_mask = t._ones_mask | single_ones_mask, t._zeros_mask | single_zeros_mask
+            if not ones_mask & zeros_mask:
+                products.append(TObject._from_masks(ones_mask, zeros_mask))
+        return products
+
+    support1 = 0
+    for t in t_objects1:
+        support1 |= t._ones_mask | t._zeros_mask
+    support2 = 0
+    for t in t_objects2:
+        support2 |= t._ones_mask | t._zeros_mask
+    common = support1 & support2
+
+    # Signature of each TObject of the second operand on the common support,
+    # and the index of its block in `block_keys`.
+    block_ids: Dict[Tuple[int, int], int] = {}
+    masks2 = []
+    for t in t_objects2:
+        block_id = block_ids.setdefault((t._ones_mask & common, t._zeros_mask & common), len(block_ids))
+        masks2.append((block_id, t._ones_mask, t._zeros_mask))
+    block_keys = list(block_ids)
+
+    products = []
+    for t1 in t_objects1:
+        ones1, zeros1 = t1._ones_mask & common, t1._zeros_mask & common
+        compatible = [not (ones1 & zeros2 or zeros1 & ones2) for ones2, zeros2 in block_keys]
+        t1_ones_mask, t1_zeros_mask = t1._ones_mask, t1._zeros_mask
+        products.extend(
+            TObject._from_masks(t1_ones_mask | t2_ones_mask, t1_zeros_mask | t2_zeros_mask)
+            for block_id, t2_ones_mask, t2_zeros_mask in masks2
+            if compatible[block_id]
+        )
+    return products
+
+
+# The subsumption reduction tests all pairs with NumPy from this many TObjects on.
+_SUBSUMPTION_VECTORIZE_MIN_SIZE = 64
+
+# A compatible group of the adjacency reduction is scanned pairwise while it has at most
+# this many TObjects per 1 of the reduced TObject, and searched by bitmask otherwise.
+_ADJACENCY_SCAN_FACTOR = 4
 
 
 class StateVector:
@@ -28,10 +110,17 @@ class StateVector:
     ----------
     _t_objects : tuple[TObject, ...]
         An immutable tuple of the TObjects comprising the vector.
+    _pivot_mask_cache : Optional[int]
+        A cached bitmask of all active variable indices in the vector.
     _pivot_set_cache : Optional[Set[int]]
         A cached set of all active variable indices in the vector.
+    _canonical_key_cache : Optional[frozenset[TObject]]
+        A cached, order-independent key of the vector, used for hashing and
+        for memoising products.
     """
 
+    __slots__ = ("_t_objects", "_pivot_mask_cache", "_pivot_set_cache", "_canonical_key_cache")
+
     def __init__(self, t_objects: Optional[List[TObject]] = None):
         """
         Initializes the StateVector.
@@ -50,14 +139,16 @@ class StateVector:
               constrained TObjects.
         """
         self._t_objects: tuple[TObject, ...] = tuple(t_objects) if t_objects is not None else tuple()
+        self._pivot_mask_cache: Optional[int] = None
         self._pivot_set_cache: Optional[Set[int]] = None
+        self._canonical_key_cache: Optional[frozenset] = None
 
     def __eq__(self, other: "StateVector") -> bool:
         """
         Check if two StateVectors are structurally identical.
 
-        Equality is determined by comparing the sorted tuples of TObjects.
-        This is primarily useful for debugging and testing.
+        Equality is determined by comparing the TObjects as multisets, so their
+        order does not matter. This is primarily useful for debugging and testing.
 
         .. warning::
            This method does not check for logical equivalence. Two logically
@@ -76,8 +167,23 @@ class StateVector:
         """
         if not isinstance(other, StateVector):
             return NotImplemented
-        # Sorting is necessary because the internal order of TObjects is not guaranteed.
-        return sorted(self._t_objects) == sorted(other._t_objects)
+        # The internal order of TObjects is not guaranteed, so the cached sets of TObjects are
+        # compared. Only if a vector has repeated TObjects do their counts need to be compared.
+        if len(self._t_objects) != len(other._t_objects) or self._canonical_key() != other._canonical_key():
+            return False
+        if len(self._canonical_key()) == len(self._t_objects):
+            return True
+        return Counter(self._t_objects) == Counter(other._t_objects)
+
+    def __hash__(self) -> int:
+        """Return a hash that is independent of the order of the TObjects."""
+        return hash(self._canonical_key())
+
+    def _canonical_key(self) -> frozenset:
+        """Return the cached, order-independent set of TObjects in the vector."""
+        if self._canonical_key_cache is None:
+            self._canonical_key_cache = frozenset(self._t_objects)
+        return self._canonical_key_cache
 
     def __mul__(self, other: "StateVector") -> "StateVector":
         """
@@ -109,11 +215,28 @@ class StateVector:
         if other.is_trivial():
             return self
 
-        new_t_objects = [prod for t1 in self._t_objects for t2 in other._t_objects if not (prod := t1 * t2).is_null]
+        is_cacheable = self.size() + other.size() <= _PRODUCT_CACHE_MAX_T_OBJECTS
+        if is_cacheable:
+            # Multiplication is commutative, so the operand keys are put in a canonical order.
+            key1, key2 = self._canonical_key(), other._canonical_key()
+            key = (key1, key2) if hash(key1) <= hash(key2) else (key2, key1)
+            cached_sv = _product_cache.get(key)
+            if cached_sv is not None:
+                _product_cache.move_to_end(key)
+                return cached_sv
+
+        new_t_objects = _multiply_t_objects(self._t_objects, other._t_objects)
+        if not new_t_objects:
+            # Every pair of TObjects conflicts, so there is nothing to simplify.
+            product_sv = StateVector()
+        else:
+            product_sv = StateVector(new_t_objects).simplify()
 
-        # A single iteration of simplification is a pragmatic choice for performance
-        # during long compilation chains.
-        return StateVector(new_t_objects).simplify(max_num_iter=1)
+        if is_cacheable and product_sv.size() <= _PRODUCT_CACHE_MAX_T_OBJECTS:
+            _product_cache[key] = product_sv
+            if len(_product_cache) > _PRODUCT_CACHE_MAX_ENTRIES:
+                _product_cache.popitem(last=False)
+        return product_sv
 
     def __repr__(self) -> str:
         """Return an unambiguous string representation of the StateVector."""
@@ -130,6 +253,25 @@ class StateVector:
         """
         return len(self._t_objects)
 
+    def pivot_mask(self) -> int:
+        """
+        Calculate the union of the pivot bitmasks of all TObjects in the vector.
+
+        Bit `i` is set if index `i` is constrained in at least one TObject.
+        The result is cached after the first calculation.
+
+        Returns
+        -------
+        int
+            The bitmask of all active variable indices in the StateVector.
+        """
+        if self._pivot_mask_cache is None:
+            support = 0
+            for t_obj in self._t_objects:
+                support |= t_obj._ones_mask | t_obj._zeros_mask
+            self._pivot_mask_cache = support
+        return self._pivot_mask_cache
+
     def pivot_set(self) -> Set[int]:
         """
         Calculate the union of pivot sets of all TObjects in the vector.
@@ -144,13 +286,7 @@ class StateVector:
             A set of all active variable indices in the StateVector.
         """
         if self._pivot_set_cache is None:
-            if not self._t_objects:
-                self._pivot_set_cache = set()
-            else:
-                all_indices = set()
-                for t_obj in self._t_objects:
-                    all_indices.update(t_obj.pivot_set)
-                self._pivot_set_cache = all_indices
+            self._pivot_set_cache = set(_mask_to_indices(self.pivot_mask()))
         return self._pivot_set_cache
 
     def _subsumption_reduction(self) -> Tuple["StateVector", bool]:
@@ -173,20 +309,37 @@ class StateVector:
         if num_t_objects < 2:
             return self, False
 
+        masks = [(t._ones_mask, t._zeros_mask) for t in self._t_objects]
+        if num_t_objects >= _SUBSUMPTION_VECTORIZE_MIN_SIZE:
+            # Of several equal TObjects only the first is kept, and a TObject is removed if it
+            # is subsumed by a different one. This is the result of the pairwise scan below.
+            first_index_by_mask: Dict[Tuple[int, int], int] = {}
+            for i, mask in enumerate(masks):
+                first_index_by_mask.setdefault(mask, i)
+            first_indices = list(first_index_by_mask.values())
+            subsumed = helpers.find_subsumed([masks[i][0] for i in first_indices], [masks[i][1] for i in first_indices])
+            final_t_objects = [self._t_objects[i] for i, is_subsumed in zip(first_indices, subsumed) if not is_subsumed]
+            if len(final_t_objects) < num_t_objects:
+                return StateVector(final_t_objects), True
+            return self, False
+
+        # The pairwise test of `TObject.is_superset`, inlined on the bitmasks.
         removed = [False] * num_t_objects
         was_modified = False
         for i in range(num_t_objects):
             if removed[i]:
                 continue
+            ones1, zeros1 = masks[i]
             for j in range(i + 1, num_t_objects):
                 if removed[j]:
                     continue
 
-                superset_status = self._t_objects[i].is_superset(self._t_objects[j])
-                if superset_status == 1:  # t_obj i is superset of t_obj j
+                ones2, zeros2 = masks[j]
+                common_ones, common_zeros = ones1 & ones2, zeros1 & zeros2
+                if common_ones == ones1 and common_zeros == zeros1:  # t_obj i is superset of t_obj j
                     removed[j] = True
                     was_modified = True
-                elif superset_status == -1:  # t_obj j is superset of t_obj i
+                elif common_ones == ones2 and common_zeros == zeros2:  # t_obj j is superset of t_obj i
                     removed[i] = True
                     was_modified = True
                     break  # t_obj i is removed, move to the next i
@@ -216,6 +369,10 @@ class StateVector:
         """
         t_objects = list(self._t_objects)
         was_modified = False
+        # After a pass, the TObjects which were not reduced cannot be reduced with each other,
+        # so the next pass only needs the groups of the new TObjects and their compatible groups.
+        # None means that all groups are searched.
+        new_group_keys = None
 
         num_iter = 0
         while max_num_iter is None or num_iter < max_num_iter:
@@ -226,43 +383,70 @@ class StateVector:
             removed = [False] * num_t_objects
             new_t_objects = []
 
-            # Group TObjects by structural properties to avoid O(N^2) comparisons.
-            # The key is a tuple of (pivot_set, ones_length). T-objects are only
-            # reducible if their pivot sets coincide and one has one more 'one'.
+            # Group TObjects by structural properties to fix the order in which they are reduced.
+            # The key is a tuple of (pivot_set, ones_length), with the pivot set as a bitmask.
+            # T-objects are only reducible if their pivot sets coincide and one has one more 'one'.
             groups = defaultdict(list)
             for i, t_obj in enumerate(t_objects):
-                key = (t_obj.pivot_set, len(t_obj.ones))
-                groups[key].append(i)
-
-            for key, group1_indices in groups.items():
-                pivot_set, ones_len = key
+                groups[(t_obj._ones_mask | t_obj._zeros_mask, _popcount(t_obj._ones_mask))].append(i)
+            # Indices of the TObjects with given (ones, zeros) bitmasks, in increasing order.
+            # It is only built if a large compatible group is met.
+            indices_by_masks = None
 
+            for (pivot_mask, ones_len), group1_indices in groups.items():
                 # Find the compatible group: same pivot set, one fewer 'one'.
-                compatible_key = (pivot_set, ones_len - 1)
-                group2_indices = groups.get(compatible_key)
-
+                group2_indices = groups.get((pivot_mask, ones_len - 1))
                 if not group2_indices:
                     continue
+                if (
+                    new_group_keys is not None
+                    and (pivot_mask, ones_len) not in new_group_keys
+                    and (pivot_mask, ones_len - 1) not in new_group_keys
+                ):
+                    continue
 
-                # Iterate through pairs from these two compatible groups.
+                # Within the compatible group, the TObjects adjacent to t_obj i are those whose 1s
+                # are a subset of its 1s. A small group is scanned in order; in a large one, they
+                # are looked up by their bitmasks (one of the 1s of t_obj i becomes a 0), and the
+                # first one in the original order is taken.
+                scan_group2 = len(group2_indices) <= _ADJACENCY_SCAN_FACTOR * ones_len
+                if not scan_group2 and indices_by_masks is None:
+                    indices_by_masks = defaultdict(list)
+                    for k, t_obj in enumerate(t_objects):
+                        indices_by_masks[(t_obj._ones_mask, t_obj._zeros_mask)].append(k)
                 for i in group1_indices:
                     if removed[i]:
                         continue
-                    for j in group2_indices:
-                        if removed[j]:
-                            continue
-
-                        reduced_obj = t_objects[i].reduce(t_objects[j])
 
-                        if reduced_obj is not None:
-                            removed[i] = True
-                            removed[j] = True
-                            new_t_objects.append(reduced_obj)
-                            was_reduced_this_iter = True
-                            break  # t_obj i has been reduced, move to next in group1
+                    ones_mask, zeros_mask = t_objects[i]._ones_mask, t_objects[i]._zeros_mask
+                    j = None
+                    if scan_group2:
+                        for k in group2_indices:
+                            if not removed[k] and t_objects[k]._ones_mask | ones_mask == ones_mask:
+                                j = k
+                                break
+                    else:
+                        remaining_ones = ones_mask
+                        while remaining_ones:
+                            bit = remaining_ones & -remaining_ones
+                            remaining_ones ^= bit
+                            for k in indices_by_masks.get((ones_mask ^ bit, zeros_mask | bit), ()):
+                                if not removed[k]:
+                                    if j is None or k < j:
+                                        j = k
+                                    break
+
+                    if j is not None:
+                        removed[i] = True
+                        removed[j] = True
+                        new_t_objects.append(TObject._from_masks(t_objects[j]._ones_mask, zeros_mask))
+                        was_reduced_this_iter = True
 
             if was_reduced_this_iter:
                 t_objects = [t_obj for i, t_obj in enumerate(t_objects) if not removed[i]] + new_t_objects
+                new_group_keys = {
+                    (t_obj._ones_mask | t_obj._zeros_mask, _popcount(t_obj._ones_mask)) for t_obj in new_t_objects
+                }
                 was_modified = True
             else:
                 break  # No more reductions possible in a full pass
@@ -276,8 +460,8 @@ class StateVector:
         """
         Perform a full simplification of the StateVector.
 
-        This method repeatedly applies adjacency reduction and optionally subsumption
-        reduction to minimize the number of TObjects in the vector.
+        This method applies adjacency reduction until a fixed point is reached, and
+        optionally subsumption reduction, to minimize the number of TObjects in the vector.
 
         .. note:: The reduction is not canonical, and hence doesn't guarantee
            a unique representation for logically equivalent StateVectors.
@@ -286,8 +470,8 @@ class StateVector:
         Parameters
         ----------
         max_num_iter : int, optional
-            The maximum number of passes for the adjacency reduction loop.
-            If None, it runs until a fixed point is reached. Defaults to 1.
+            Has no effect: the adjacency reduction always runs to a fixed point.
+            Kept for backward compatibility.
         reduce_subsumption : bool, optional
             If True, subsumption reduction is also performed, which is more
             computationally expensive but can yield a smaller vector.
@@ -298,21 +482,25 @@ class StateVector:
         StateVector
             A new, simplified StateVector.
         """
-        # Remove nulls and duplicates. `dict.fromkeys` preserves order.
-        t_objects = list(dict.fromkeys(t for t in self._t_objects if not t.is_null))
+        # Remove nulls and duplicates, keeping the first of equal TObjects. The dict is keyed
+        # by the bitmasks, so no `TObject.__hash__` call is needed, and it preserves order.
+        unique_t_objects: Dict[Tuple[int, int], TObject] = {}
+        for t_obj in self._t_objects:
+            if not t_obj._is_null:
+                unique_t_objects.setdefault((t_obj._ones_mask, t_obj._zeros_mask), t_obj)
 
         # If any TObject is trivial (fully unconstrained), it covers all possible states.
-        if any(t_obj.is_trivial for t_obj in t_objects):
+        if (0, 0) in unique_t_objects:
             return StateVector([TObject()])
 
-        current_sv = StateVector(t_objects)
+        current_sv = StateVector(list(unique_t_objects.values()))
 
         if reduce_subsumption:
             current_sv, _ = current_sv._subsumption_reduction()
 
-        was_modified = True
-        while was_modified:
-            current_sv, was_modified = current_sv._adjacency_reduction(max_num_iter=max_num_iter)
+        # The passes run to a fixed point in a single call, so that every pass after the first
+        # only searches the groups of the TObjects created by the previous pass.
+        current_sv, _ = current_sv._adjacency_reduction(max_num_iter=None)
 
         if reduce_subsumption:
             current_sv, _ = current_sv._subsumption_reduction()
@@ -333,7 +521,8 @@ class StateVector:
         StateVector
             A new StateVector with the variables negated in each TObject.
         """
-        new_t_objects = [t.negate_variables(variable_indices) for t in self._t_objects]
+        mask = _variables_to_mask(variable_indices)
+        new_t_objects = [t._negate_mask(mask) for t in self._t_objects]
         return StateVector(new_t_objects)
 
     def remove_variables(self, variable_indices: Tuple[List[int], int]) -> "StateVector":
@@ -353,7 +542,8 @@ class StateVector:
         StateVector
             A new StateVector with the variables removed.
         """
-        new_t_objects = [t.remove_variables(variable_indices) for t in self._t_objects]
+        mask = _variables_to_mask(variable_indices)
+        new_t_objects = [t._remove_mask(mask) for t in self._t_objects]
         return StateVector(new_t_objects)
 
     def is_contradiction(self) -> bool:
@@ -418,9 +608,15 @@ class StateVector:
             # If it's unconstrained in any TObject, the consolidated value is undetermined.
             return -1
 
+        # Every other TObject must fix the variable to the same value, i.e. have its bit set in
+        # the same bitmask. The scan stops at the first TObject that does not.
+        bit = 1 << index
         for t_obj in self._t_objects[1:]:
-            if t_obj.var_value(index) != first_value:
-                # If the value differs in any other TObject, it's mixed.
+            if not (t_obj._ones_mask if first_value else t_obj._zeros_mask) & bit:
+                # A null TObject has no bits set, so it also ends up here and has no value.
+                if t_obj._is_null:
+                    raise ValueError("Cannot determine variable value for a null TObject.")
+                # The value differs or is unconstrained, so it's mixed.
                 return -1
         return first_value
 
@@ -452,8 +648,8 @@ class StateVector:
 
         effective_max_index = max_index
         if effective_max_index is None:
-            all_indices = self.pivot_set()
-            effective_max_index = max(all_indices) if all_indices else 0
+            # The largest constrained index is the highest set bit of the pivot mask.
+            effective_max_index = max(self.pivot_mask().bit_length() - 1, 0)
 
         content_indent_str = " " * (indent + 4) if print_brackets else base_indent_str
 
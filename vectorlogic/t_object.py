@@ -6,7 +6,68 @@ in the rules engine. It represents an immutable ternary object, where each
 variable can be in one of three states: True (1), False (0), or Schrödinger's cat (-).
 """
 
-from typing import Dict, Iterable, Optional, List, Tuple
+from typing import Dict, Iterable, Optional, List, Tuple, Union
+
+
+if hasattr(int, "bit_count"):
+
+    def _popcount(mask: int) -> int:
+        """Return the number of set bits of a non-negative integer."""
+        return mask.bit_count()
+
+else:  # pragma: no cover - Python < 3.10
+
+    def _popcount(mask: int) -> int:
+        """Return the number of set bits of a non-negative integer."""
+        return bin(mask).count("1")
+
+
+def _indices_to_mask(indices: Iterable[int]) -> int:
+    """Pack an iterable of non-negative variable indices into an integer bitmask."""
+    mask = 0
+    for i in indices:
+        mask |= 1 << i
+    return mask
+
+
+def _variables_to_mask(variable_indices: Union[List[int], int]) -> int:
+    """Pack a single variable index or a list of indices into an integer bitmask."""
+    if isinstance(variable_indices, int):
+        return 1 << variable_indices
+    return _indices_to_mask(variable_indices)
+
+
+def _mask_to_indices(mask: int) -> frozenset[int]:
+    """Unpack an integer bitmask into the frozenset of the indices of its set bits."""
+    indices = []
+    while mask:
+        lowest_bit = mask & -mask
+        indices.append(lowest_bit.bit_length() - 1)
+        mask ^= lowest_bit
+    return frozenset(indices)
+
+
+def _sorted_indices_less(mask1: int, mask2: int) -> bool:
+    """
+    Compare the sorted lists of the indices of two bitmasks lexicographically.
+
+    The lists agree up to the lowest bit where the bitmasks differ. The list with
+    that index is smaller, unless the other list has no larger index left and is
+    therefore a prefix of it.
+    """
+    diff = mask1 ^ mask2
+    if not diff:
+        return False
+    lowest_bit = diff & -diff
+    if mask1 & lowest_bit:
+        return mask2 & -lowest_bit != 0
+    return mask1 & -lowest_bit == 0
+
+
+# The shared trivial and null TObjects, returned by `TObject()` and `TObject(is_null=True)`.
+# They are created once, right after the class definition.
+_TRIVIAL_T_OBJECT: Optional["TObject"] = None
+_NULL_T_OBJECT: Optional["TObject"] = None
 
 
 class TObject:
@@ -19,8 +80,11 @@ class TObject:
     This makes it logically equivalent to a conjunction of literals. For example,
     `TObject(ones={1}, zeros={3})` corresponds to `v1 AND (NOT v3)`.
 
-    The internal state is defined by two frozensets: `ones` for indices fixed
-    to 1 and `zeros` for indices fixed to 0. An object with conflicting
+    The internal state is defined by two integer bitmasks: bit `i` of the
+    `ones` mask is set if index `i` is fixed to 1, and bit `i` of the `zeros`
+    mask if it is fixed to 0. The hot operations such as multiplication are
+    carried out with a few bitwise operations instead of set arithmetic, and
+    the `ones` and `zeros` frozensets are only built when they are accessed. An object with conflicting
     constraints (i.e., overlapping `ones` and `zeros` sets) represents a
     logical contradiction and is automatically converted to a "null" state.
 
@@ -29,14 +93,17 @@ class TObject:
     allows any variable to be assigned any value, effectively matching all
     possible states.
 
+    TObjects are immutable, so `TObject()` and `TObject(is_null=True)` always
+    return the same shared trivial and null instances.
+
     Parameters
     ----------
     ones : Iterable[int], optional
         An iterable of 1-based indices where the state is 1 (True).
-        Defaults to None.
+        Indices must be non-negative. Defaults to None.
     zeros : Iterable[int], optional
         An iterable of 1-based indices where the state is 0 (False).
-        Defaults to None.
+        Indices must be non-negative. Defaults to None.
     is_null : bool, optional
         If True, creates a null object representing a contradiction.
         Defaults to False.
@@ -53,42 +120,99 @@ class TObject:
     Raises
     ------
     ValueError
-        If `is_null` is True and `ones` or `zeros` are also provided.
+        If `is_null` is True and `ones` or `zeros` are also provided, or if
+        a negative index is given.
     """
 
+    __slots__ = ("_ones", "_zeros", "_ones_mask", "_zeros_mask", "_is_null", "_pivot_set", "_hash")
+
+    def __new__(
+        cls,
+        ones: Optional[Iterable[int]] = None,
+        zeros: Optional[Iterable[int]] = None,
+        is_null: bool = False,
+    ):
+        if ones is None and zeros is None and cls is TObject:
+            interned = _NULL_T_OBJECT if is_null else _TRIVIAL_T_OBJECT
+            if interned is not None:
+                return interned
+        return super().__new__(cls)
+
     def __init__(
         self,
         ones: Optional[Iterable[int]] = None,
         zeros: Optional[Iterable[int]] = None,
         is_null: bool = False,
     ):
+        if self is _TRIVIAL_T_OBJECT or self is _NULL_T_OBJECT:
+            # An interned instance returned by `__new__` is already initialized.
+            return
+
         if is_null and (ones is not None or zeros is not None):
             raise ValueError("Cannot specify 'ones' or 'zeros' when 'is_null' is True.")
 
-        self._ones: frozenset[int] = frozenset(ones) if ones is not None else frozenset()
-        self._zeros: frozenset[int] = frozenset(zeros) if zeros is not None else frozenset()
+        self._ones_mask: int = _indices_to_mask(ones) if ones is not None else 0
+        self._zeros_mask: int = _indices_to_mask(zeros) if zeros is not None else 0
 
-        if not self._ones.isdisjoint(self._zeros):
+        if self._ones_mask & self._zeros_mask:
             # A contradiction was created (e.g., index 1 is both 0 and 1).
             # This becomes a null object.
-            self._ones = frozenset()
-            self._zeros = frozenset()
+            self._ones_mask = 0
+            self._zeros_mask = 0
             self._is_null: bool = True
         else:
             self._is_null = is_null
 
+        # The frozensets are decoded from the bitmasks on first access.
+        self._ones: Optional[frozenset[int]] = None
+        self._zeros: Optional[frozenset[int]] = None
+
         self._pivot_set: Optional[frozenset[int]] = None
+        self._hash: Optional[int] = None
+
+    @classmethod
+    def _from_masks(cls, ones_mask: int, zeros_mask: int) -> "TObject":
+        """
+        Create a non-null TObject from non-conflicting bitmasks, skipping validation.
+
+        This is used by the hot operations, which already know the bitmasks of
+        their result and that its constraints do not conflict. The `ones` and
+        `zeros` frozensets are decoded from the bitmasks on first access.
+        """
+        t_obj = object.__new__(cls)
+        t_obj._ones = None
+        t_obj._zeros = None
+        t_obj._ones_mask = ones_mask
+        t_obj._zeros_mask = zeros_mask
+        t_obj._is_null = False
+        t_obj._pivot_set = None
+        t_obj._hash = None
+        return t_obj
 
     @property
     def ones(self) -> frozenset[int]:
         """The frozenset of indices fixed to 1 (True)."""
+        if self._ones is None:
+            self._ones = _mask_to_indices(self._ones_mask)
         return self._ones
 
     @property
     def zeros(self) -> frozenset[int]:
         """The frozenset of indices fixed to 0 (False)."""
+        if self._zeros is None:
+            self._zeros = _mask_to_indices(self._zeros_mask)
         return self._zeros
 
+    @property
+    def ones_mask(self) -> int:
+        """The bitmask of the indices fixed to 1 (True): bit `i` is set if index `i` is 1."""
+        return self._ones_mask
+
+    @property
+    def zeros_mask(self) -> int:
+        """The bitmask of the indices fixed to 0 (False): bit `i` is set if index `i` is 0."""
+        return self._zeros_mask
+
     @property
     def is_null(self) -> bool:
         """Return True if the TObject represents a contradiction."""
@@ -102,18 +226,27 @@ class TObject:
         A trivial TObject has no constraints (empty `zeros` and `ones`)
         and is not null.
         """
-        return not self.is_null and not self._ones and not self._zeros
+        return not self._is_null and not (self._ones_mask | self._zeros_mask)
+
+    @property
+    def pivot_mask(self) -> int:
+        """
+        Return the bitmask of all constrained variable indices (both 1s and 0s).
+
+        Bit `i` is set if index `i` is constrained. Prefer it to `pivot_set`
+        when only membership or overlap tests are needed.
+        """
+        return self._ones_mask | self._zeros_mask
 
     @property
     def pivot_set(self) -> frozenset[int]:
         """
         Return the set of all constrained variable indices (both 1s and 0s).
+
+        The set is decoded from `pivot_mask` on first access.
         """
         if self._pivot_set is None:
-            if self._is_null:
-                self._pivot_set = frozenset()
-            else:
-                self._pivot_set = self._ones.union(self._zeros)
+            self._pivot_set = _mask_to_indices(self._ones_mask | self._zeros_mask)
         return self._pivot_set
 
     def var_value(self, index: int) -> int:
@@ -140,9 +273,11 @@ class TObject:
         """
         if self._is_null:
             raise ValueError("Cannot determine variable value for a null TObject.")
-        if index in self._ones:
+        if index < 0:
+            return -1
+        if self._ones_mask >> index & 1:
             return 1
-        if index in self._zeros:
+        if self._zeros_mask >> index & 1:
             return 0
         return -1
 
@@ -168,17 +303,15 @@ class TObject:
         if self.is_trivial:
             return "---"
 
-        effective_max = max_index if max_index is not None else max(self.pivot_set, default=0)
+        effective_max = max_index if max_index is not None else max(self.pivot_mask.bit_length() - 1, 0)
 
-        result = ["-"] * effective_max
-        for i in self._ones:
-            if 1 <= i <= effective_max:
-                result[i - 1] = "1"
-        for i in self._zeros:
-            if 1 <= i <= effective_max:
-                result[i - 1] = "0"
+        if effective_max <= 0:
+            return ""
 
-        return " ".join(result)
+        ones_mask, zeros_mask = self._ones_mask, self._zeros_mask
+        return " ".join(
+            "1" if ones_mask >> i & 1 else "0" if zeros_mask >> i & 1 else "-" for i in range(1, effective_max + 1)
+        )
 
     def to_dict(self, index_to_name: Dict[int, str]) -> Optional[Dict[str, bool]]:
         """
@@ -228,14 +361,21 @@ class TObject:
         if not isinstance(other, TObject):
             return NotImplemented
 
-        if self.is_null or other.is_null:
+        if self._is_null or other._is_null:
             return TObject(is_null=True)
 
-        new_ones = self.ones.union(other.ones)
-        new_zeros = self.zeros.union(other.zeros)
+        ones_mask = self._ones_mask | other._ones_mask
+        zeros_mask = self._zeros_mask | other._zeros_mask
+        if ones_mask & zeros_mask:
+            return TObject(is_null=True)
 
-        # The constructor handles the check for contradictions (ones/zeros overlap)
-        return TObject(ones=new_ones, zeros=new_zeros)
+        # If the constraints of one operand contain those of the other, the product is that
+        # operand (this includes a trivial other operand), and TObjects are immutable.
+        if ones_mask == self._ones_mask and zeros_mask == self._zeros_mask:
+            return self
+        if ones_mask == other._ones_mask and zeros_mask == other._zeros_mask:
+            return other
+        return TObject._from_masks(ones_mask, zeros_mask)
 
     def negate_variables(self, variable_indices: Tuple[List[int], int]) -> "TObject":
         """
@@ -254,15 +394,18 @@ class TObject:
         TObject
             A new `TObject` with the specified variables negated.
         """
+        return self._negate_mask(_variables_to_mask(variable_indices))
+
+    def _negate_mask(self, mask: int) -> "TObject":
+        """Return the TObject with the variables of a bitmask negated, see `negate_variables`."""
         if self._is_null:
             return TObject(is_null=True)
+        if not (self._ones_mask | self._zeros_mask) & mask:
+            return self  # None of the variables is constrained, and TObjects are immutable.
 
-        indices = {variable_indices} if isinstance(variable_indices, int) else set(variable_indices)
-
-        new_ones = (self.ones.difference(indices)).union(self.zeros.intersection(indices))
-        new_zeros = (self.zeros.difference(indices)).union(self.ones.intersection(indices))
-
-        return TObject(ones=new_ones, zeros=new_zeros)
+        new_ones_mask = (self._ones_mask & ~mask) | (self._zeros_mask & mask)
+        new_zeros_mask = (self._zeros_mask & ~mask) | (self._ones_mask & mask)
+        return TObject._from_masks(new_ones_mask, new_zeros_mask)
 
     def remove_variables(self, variable_indices: Tuple[List[int], int]) -> "TObject":
         """
@@ -281,14 +424,16 @@ class TObject:
         TObject
             A new `TObject` with the constraints on the specified variables removed.
         """
+        return self._remove_mask(_variables_to_mask(variable_indices))
+
+    def _remove_mask(self, mask: int) -> "TObject":
+        """Return the TObject with the variables of a bitmask removed, see `remove_variables`."""
         if self._is_null:
             return TObject(is_null=True)
-        indices = {variable_indices} if isinstance(variable_indices, int) else set(variable_indices)
-
-        new_ones = self.ones.difference(indices)
-        new_zeros = self.zeros.difference(indices)
+        if not (self._ones_mask | self._zeros_mask) & mask:
+            return self  # None of the variables is constrained, and TObjects are immutable.
 
-        return TObject(ones=new_ones, zeros=new_zeros)
+        return TObject._from_masks(self._ones_mask & ~mask, self._zeros_mask & ~mask)
 
     def reduce(self, other: "TObject") -> Optional["TObject"]:
         """
@@ -314,22 +459,14 @@ class TObject:
         if not isinstance(other, TObject):
             return None
 
-        ones_diff = self.ones.symmetric_difference(other.ones)
-        if len(ones_diff) == 1:
-            zeros_diff = self.zeros.symmetric_difference(other.zeros)
-            if ones_diff == zeros_diff:
-                # This confirms they differ at exactly one position, one being
-                # a 1 and the other a 0.
-                (idx,) = ones_diff
-                if idx in self.ones:
-                    # self has the 1, other has the 0
-                    new_ones = other.ones
-                    new_zeros = self.zeros
-                else:
-                    # other has the 1, self has the 0
-                    new_ones = self.ones
-                    new_zeros = other.zeros
-                return TObject(ones=new_ones, zeros=new_zeros)
+        # They must differ at exactly one position, one being a 1 and the other a 0.
+        ones_diff = self._ones_mask ^ other._ones_mask
+        if ones_diff and not ones_diff & (ones_diff - 1) and self._zeros_mask ^ other._zeros_mask == ones_diff:
+            if self._ones_mask & ones_diff:
+                # self has the 1, other has the 0
+                return TObject._from_masks(other._ones_mask, self._zeros_mask)
+            # other has the 1, self has the 0
+            return TObject._from_masks(self._ones_mask, other._zeros_mask)
 
         return None
 
@@ -353,29 +490,42 @@ class TObject:
             - -1 if `other` is a superset of this TObject.
             -  0 otherwise (no superset relationship).
         """
-        is_self_superset = self.ones.issubset(other.ones) and self.zeros.issubset(other.zeros)
+        ones1, zeros1, ones2, zeros2 = self._ones_mask, self._zeros_mask, other._ones_mask, other._zeros_mask
+        is_self_superset = ones1 & ones2 == ones1 and zeros1 & zeros2 == zeros1
         if is_self_superset:
             # This case also handles equality, where both are supersets of each other.
             return 1
 
-        is_other_superset = other.ones.issubset(self.ones) and other.zeros.issubset(self.zeros)
+        is_other_superset = ones1 & ones2 == ones2 and zeros1 & zeros2 == zeros2
         if is_other_superset:
             return -1
         return 0
 
     def __eq__(self, other: object) -> bool:
         """Check for equality between two TObjects."""
+        if self is other:
+            return True
         if not isinstance(other, TObject):
             return NotImplemented
 
-        if self.is_null:
-            return other.is_null
+        if self._is_null:
+            return other._is_null
 
-        return not other.is_null and self.ones == other.ones and self.zeros == other.zeros
+        return not other._is_null and self._ones_mask == other._ones_mask and self._zeros_mask == other._zeros_mask
 
     def __hash__(self) -> int:
-        """Return a hash based on the immutable state."""
-        return hash((self.is_null, self.ones, self.zeros))
+        """Return a hash based on the immutable state, computed once."""
+        if self._hash is None:
+            self._hash = hash((self._is_null, self._ones_mask, self._zeros_mask))
+        return self._hash
+
+    def __reduce__(self):
+        """Rebuild copies and pickles through the constructor, which keeps the shared instances intact."""
+        if self._is_null:
+            return TObject, (None, None, True)
+        if not (self._ones_mask or self._zeros_mask):
+            return TObject, ()
+        return TObject, (sorted(self.ones), sorted(self.zeros))
 
     def __repr__(self) -> str:
         """Return the canonical string representation."""
@@ -395,13 +545,16 @@ class TObject:
         if not isinstance(other, TObject):
             return NotImplemented
 
-        if self.is_null:
-            return not other.is_null
-        if other.is_null:
+        if self._is_null:
+            return not other._is_null
+        if other._is_null:
             return False
 
         # Sort by 'ones' then 'zeros' for a stable, canonical order.
-        self_tuple = (sorted(list(self.ones)), sorted(list(self.zeros)))
-        other_tuple = (sorted(list(other.ones)), sorted(list(other.zeros)))
+        if self._ones_mask != other._ones_mask:
+            return _sorted_indices_less(self._ones_mask, other._ones_mask)
+        return _sorted_indices_less(self._zeros_mask, other._zeros_mask)
+
 
-        return self_tuple < other_tuple
+_TRIVIAL_T_OBJECT = TObject()
+_NULL_T_OBJECT = TObject(is_null=True)